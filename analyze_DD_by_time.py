@@ -1,5 +1,6 @@
 import pandas as pd
 import matplotlib.pyplot as plt
+from report import show
 
 # โหลด trade log (ต้องมีคอลัมน์ entry, exit, tradeDD)
 trades = pd.read_csv("trade_log_partial_noSL.csv", parse_dates=["entry","exit"])
@@ -29,11 +30,11 @@ plt.title("Average In-trade DD by Hour (Thai Time)")
 plt.xlabel("Hour of Day (Thai Time)")
 plt.ylabel("Average DD (pips)")
 plt.grid(True, alpha=0.3)
-plt.show()
+show()
 
 plt.figure(figsize=(8,4))
 dd_by_day.loc[["Monday","Tuesday","Wednesday","Thursday","Friday"]]["mean"].plot(kind="bar", color="blue", alpha=0.7)
 plt.title("Average In-trade DD by Day (Thai Time)")
 plt.ylabel("Average DD (pips)")
 plt.grid(True, alpha=0.3)
-plt.show()
+show()
@@ -1,20 +1,15 @@
 import pandas as pd
 import matplotlib.pyplot as plt
+from datastore import load_pair
+from report import show
+from indicators import make_indicators
 
 # === Load Data (H1) ===
-eur = pd.read_csv("data/EURUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
-gbp = pd.read_csv("data/GBPUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
-
-df = pd.DataFrame({
-    "EURUSD": eur["close"],
-    "GBPUSD": gbp["close"]
-}).dropna()
+df = load_pair("H1")
 
 # คำนวณ spread, zscore, correlation
 window = 50
-df["spread"] = df["EURUSD"] - df["GBPUSD"]
-df["zscore"] = (df["spread"] - df["spread"].rolling(window).mean()) / df["spread"].rolling(window).std()
-df["corr"] = df["EURUSD"].rolling(window).corr(df["GBPUSD"])
+df = make_indicators(df, window)
 df = df.dropna()
 
 COST = 1.2  # pip ต่อรอบ (2 ขา)
@@ -72,7 +67,7 @@ for label, zval, corrval in cases:
 plt.title("Equity Curve Comparison (H1 Hedge, COST=1.2 pips)")
 plt.xlabel("Date"); plt.ylabel("Cumulative PnL (pips)")
 plt.legend(); plt.grid(True)
-plt.show()
+show()
 
 # === Show Summary ===
 res_df = pd.DataFrame(results, columns=["Case", "Trades", "Total PnL", "Win rate", "Avg Holding (h)"])
@@ -1,15 +1,11 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+from datastore import load_pair
+from report import show
 
 # === โหลดไฟล์ H1 ===
-eur = pd.read_csv("data/EURUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
-gbp = pd.read_csv("data/GBPUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
-
-df = pd.DataFrame({
-    "EURUSD": eur["close"],
-    "GBPUSD": gbp["close"]
-}).dropna()
+df = load_pair("H1")
 
 # คำนวณ spread และ zscore
 window = 50
@@ -55,7 +51,7 @@ plt.plot(df.index[-len(eq25):], eq25, label="Z>2.5")
 plt.title("Equity Curve Comparison (H1 Hedge, COST=1.2 pips)")
 plt.xlabel("Date"); plt.ylabel("Cumulative PnL (pips)")
 plt.legend(); plt.grid()
-plt.show()
+show()
 
 # Summary
 def summary(name, equity, pnl, hold):
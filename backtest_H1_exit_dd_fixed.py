@@ -1,21 +1,16 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+from datastore import load_pair
+from report import show
+from indicators import make_indicators
 
 # === Load H1 Data ===
-eur = pd.read_csv("data/EURUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
-gbp = pd.read_csv("data/GBPUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
-
-df = pd.DataFrame({
-    "EURUSD": eur["close"],
-    "GBPUSD": gbp["close"]
-}).dropna()
+df = load_pair("H1")
 
 # Indicators
 window = 50
-df["spread"] = df["EURUSD"] - df["GBPUSD"]
-df["zscore"] = (df["spread"] - df["spread"].rolling(window).mean()) / df["spread"].rolling(window).std()
-df["corr"] = df["EURUSD"].rolling(window).corr(df["GBPUSD"])
+df = make_indicators(df, window)
 df = df.dropna()
 
 COST = 1.2   # pip ต่อรอบ (2 legs)
@@ -109,4 +104,4 @@ for label, (mode, kwargs) in cases.items():
 plt.title("Equity Curve Comparison (With DD, COST=1.2 pips)")
 plt.ylabel("Cumulative PnL (pips)")
 plt.legend(); plt.grid(True)
-plt.show()
+show()
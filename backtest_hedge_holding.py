@@ -1,17 +1,15 @@
 import pandas as pd
 import matplotlib.pyplot as plt
+from datastore import load_pair
+from report import show
+from indicators import make_indicators
 
 # --- Load Data (H1) ---
-eur = pd.read_csv("data/EURUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
-gbp = pd.read_csv("data/GBPUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
-
-df = pd.DataFrame({"EURUSD": eur["close"], "GBPUSD": gbp["close"]}).dropna()
+df = load_pair("H1")
 
 # --- Indicators ---
 window = 20
-df["spread"] = df["EURUSD"] - df["GBPUSD"]
-df["zscore"] = (df["spread"] - df["spread"].rolling(window).mean()) / df["spread"].rolling(window).std()
-df["corr"] = df["EURUSD"].rolling(window).corr(df["GBPUSD"])
+df = make_indicators(df, window)
 
 # --- Parameters ---
 COST = 1.2  # broker cost in pips (2 legs: EURUSD + GBPUSD)
@@ -79,7 +77,7 @@ plt.title("Equity Curve (H1 Hedge, COST=1.2 pips)")
 plt.xlabel("Date")
 plt.ylabel("Cumulative PnL (pips)")
 plt.grid(True)
-plt.show()
+show()
 
 # --- Plot Holding time distribution ---
 plt.figure(figsize=(10,5))
@@ -87,4 +85,4 @@ plt.hist(results["holding_hours"], bins=30, color="skyblue", edgecolor="black")
 plt.title("Distribution of Holding Time (H1 Hedge, COST=1.2 pips)")
 plt.xlabel("Holding time (hours)")
 plt.ylabel("Number of trades")
-plt.show()
+show()
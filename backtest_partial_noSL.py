@@ -1,64 +1,29 @@
-import pandas as pd
 import matplotlib.pyplot as plt
+from engine import backtest_partial
+from result_cache import cached_backtest
+from run_store import RunStore
+from datastore import load_pair
+from report import show
+from indicators import make_indicators
 
 # === Load H1 Data ===
-eur = pd.read_csv("data/EURUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
-gbp = pd.read_csv("data/GBPUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
-
-df = pd.DataFrame({
-    "EURUSD": eur["close"],
-    "GBPUSD": gbp["close"]
-}).dropna()
+df = load_pair("H1")
 
 # Indicators
 window = 50
-df["spread"] = df["EURUSD"] - df["GBPUSD"]
-df["zscore"] = (df["spread"] - df["spread"].rolling(window).mean()) / df["spread"].rolling(window).std()
-df["corr"] = df["EURUSD"].rolling(window).corr(df["GBPUSD"])
+df = make_indicators(df, window)
 df = df.dropna()
 
 COST = 1.2   # cost ต่อรอบ (2 legs)
 
 def backtest_partial_noSL(z_threshold=2.0, corr_threshold=0.8, filename="trade_log_partial_noSL.csv"):
-    equity = 0
-    in_trade, entry_z, entry_spread, entry_time = False, 0, 0, None
-    trade_log = []
-
-    for t, row in df.iterrows():
-        z, corr, spread = row["zscore"], row["corr"], row["spread"]
-
-        if not in_trade:
-            # Entry
-            if abs(z) > z_threshold and corr > corr_threshold:
-                in_trade, entry_z, entry_spread, entry_time = True, z, spread, t
-                partial_pnl = 0
-                worst_unreal = 0
-        else:
-            # Unrealized PnL
-            move = (spread - entry_spread) * 10000 if entry_z > 0 else (entry_spread - spread) * 10000
-            unrealized = move - COST
-            worst_unreal = min(worst_unreal, unrealized)
-
-            exit_trade, trade_pnl = False, 0
-            # ไม่มี SL → รอให้ spread กลับมา
-            if abs(z) <= 1.0 and partial_pnl == 0:
-                partial_pnl = (abs(entry_z - z) * 10)/2 - COST/2
-            if abs(z) < 0.1:
-                exit_trade, trade_pnl = True, partial_pnl + ((abs(entry_z - z) * 10)/2 - COST/2)
-
-            if exit_trade:
-                equity += trade_pnl
-                trade_log.append({
-                    "entry": entry_time,
-                    "exit": t,
-                    "PnL": trade_pnl,
-                    "holding_h": (t - entry_time).total_seconds()/3600,
-                    "equity": equity,
-                    "tradeDD": worst_unreal
-                })
-                in_trade = False
-
-    trades = pd.DataFrame(trade_log)
+    # state machine เดียวกับ loop เดิม (partial ที่ |z|<=1, ปิดที่ |z|<0.1, ไม่มี SL) -> engine.simulate
+    # ข้อมูล / params เดิม -> โหลดผลจาก result cache ไม่ต้อง simulate ใหม่
+    with RunStore() as runs:
+        run = cached_backtest(df, backtest_partial,
+                              dict(z_threshold=z_threshold, corr_threshold=corr_threshold, cost=COST),
+                              columns=["spread", "zscore", "corr"], runs=runs, tf="H1")
+    trades = run["trades"]
 
     # คำนวณ Drawdown จาก equity curve
     trades["cummax"] = trades["equity"].cummax()
@@ -90,7 +55,7 @@ def backtest_partial_noSL(z_threshold=2.0, corr_threshold=0.8, filename="trade_l
     ax[1].legend()
 
     plt.tight_layout()
-    plt.show()
+    show()
 
     return trades
 
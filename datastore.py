@@ -0,0 +1,333 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# === Binary columnar cache for data/*.csv ===
+# แปลง CSV ครั้งเดียว -> data/cache/<name>-<hash ของ path>/ (datetime เป็น int64 epoch ns + .npy ต่อคอลัมน์)
+# ถ้า mtime / size ของ CSV ต้นฉบับไม่เปลี่ยน จะ memmap ไฟล์ .npy กลับมาใช้เลย ไม่ต้อง parse ใหม่
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(base_dir, "data")
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
+INDEX_COL = "datetime"
+
+
+def _source_stamp(csv_path):
+    st = os.stat(csv_path)
+    return {"src_mtime_ns": st.st_mtime_ns, "src_size": st.st_size}
+
+
+def _path_digest(path):
+    return hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+
+
+def _cache_path(csv_path, cache_dir=None):
+    # ชื่อไฟล์ + hash ของ path เต็ม -> CSV ชื่อเดียวกันคนละโฟลเดอร์ไม่ทับ cache กัน
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir or CACHE_DIR, f"{name}-{_path_digest(csv_path)}")
+
+
+def _read_meta(path):
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def build_cache(csv_path, cache_dir=None):
+    """Parse one CSV and write it as per-column .npy files plus meta.json."""
+    path = _cache_path(csv_path, cache_dir)
+    stamp = _source_stamp(csv_path)
+    df = pd.read_csv(csv_path, parse_dates=[INDEX_COL], index_col=INDEX_COL)
+
+    # เขียนลง tmp ก่อนแล้วค่อย rename กันไฟล์ครึ่ง ๆ กลาง ๆ ถ้ามีหลาย process build พร้อมกัน
+    tmp = f"{path}.tmp{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    np.save(os.path.join(tmp, f"{INDEX_COL}.npy"), df.index.values.astype("datetime64[ns]").view(np.int64))
+    for col in df.columns:
+        np.save(os.path.join(tmp, f"{col}.npy"), df[col].to_numpy())
+    meta = dict(stamp, source=os.path.abspath(csv_path), rows=len(df), columns=list(df.columns))
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=1)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+    return path
+
+
+def ensure_cache(csv_path, cache_dir=None):
+    """Return the cache directory for csv_path, rebuilding it if the CSV changed."""
+    path = _cache_path(csv_path, cache_dir)
+    meta = _read_meta(path)
+    stamp = _source_stamp(csv_path)
+    if (meta is None or meta.get("source") != os.path.abspath(csv_path)
+            or any(meta.get(k) != v for k, v in stamp.items())):
+        build_cache(csv_path, cache_dir)
+    return path
+
+
+def load_arrays(csv_path, cache_dir=None):
+    """Memory-map the cached columns; returns {"datetime": int64 ns, col: array, ...}."""
+    path = ensure_cache(csv_path, cache_dir)
+    meta = _read_meta(path)
+    arrays = {INDEX_COL: np.load(os.path.join(path, f"{INDEX_COL}.npy"), mmap_mode="r")}
+    for col in meta["columns"]:
+        arrays[col] = np.load(os.path.join(path, f"{col}.npy"), mmap_mode="r")
+    return arrays
+
+
+def load_csv(csv_path, cache_dir=None):
+    """Drop-in for pd.read_csv(csv_path, parse_dates=["datetime"], index_col="datetime")."""
+    arrays = load_arrays(csv_path, cache_dir)
+    index = pd.DatetimeIndex(np.asarray(arrays.pop(INDEX_COL)).view("datetime64[ns]"), name=INDEX_COL)
+    return pd.DataFrame({col: np.asarray(a) for col, a in arrays.items()}, index=index, copy=False)
+
+
+def load_symbol(symbol, tf, year=2024, data_dir=None):
+    """Load data/<SYMBOL>_<TF>_<year>.csv through the cache."""
+    return load_csv(os.path.join(data_dir or DATA_DIR, f"{symbol}_{tf}_{year}.csv"))
+
+
+# === Aligned multi-symbol store ===
+# รวมหลาย symbol ของ TF/ปีเดียวกันไว้บน timestamp index (int64 ns) ชุดเดียว -> สคริปต์ไม่ต้อง join/dropna ทุกครั้ง
+# data/cache/merged/<SYM1-SYM2..>_<TF>_<year>_<fill>-<hash ของ data_dir>/ : datetime.npy + <SYMBOL>.<field>.npy + meta.json
+# fill: "drop" = เก็บเฉพาะแท่งที่มีครบทุก symbol (เหมือน dropna เดิม)
+#       "ffill" = แท่งที่ขาดใช้ close ก่อนหน้า (open=high=low=close, volume=0) เริ่มจากแท่งที่ทุก symbol มีข้อมูลแล้ว
+#       "nan" = เก็บทุก timestamp ค่าที่ขาดเป็น NaN
+MERGED_DIR = os.path.join(CACHE_DIR, "merged")
+FILL_POLICIES = ("drop", "ffill", "nan")
+PRICE_FIELDS = ("open", "high", "low", "close")
+
+
+def _symbol_csv(symbol, tf, year, data_dir=None):
+    return os.path.join(data_dir or DATA_DIR, f"{symbol}_{tf}_{year}.csv")
+
+
+def _merged_path(tf, year, symbols, fill, cache_dir=None, data_dir=None):
+    # แยกตามโฟลเดอร์ต้นทาง -> ingest ลง scratch dir ไม่ทับ store ของ data/
+    name = f"{'-'.join(symbols)}_{tf}_{year}_{fill}-{_path_digest(data_dir or DATA_DIR)}"
+    return os.path.join(cache_dir or MERGED_DIR, name)
+
+
+def _missing_ranges(times, missing, limit=20):
+    # ช่วง timestamp ที่ขาดติดกัน -> [(start, end, bars)] ยาวสุดก่อน
+    idx = np.flatnonzero(missing)
+    if len(idx) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(idx) > 1)
+    starts = np.concatenate([[idx[0]], idx[breaks + 1]])
+    ends = np.concatenate([idx[breaks], [idx[-1]]])
+    order = np.argsort(-(ends - starts), kind="stable")[:limit]
+    fmt = lambda i: str(pd.Timestamp(int(times[i])))
+    return [(fmt(starts[k]), fmt(ends[k]), int(ends[k] - starts[k] + 1)) for k in order]
+
+
+def alignment_report(times, present, limit=20):
+    """Per-symbol rows / missing bars / longest missing runs against the union of timestamps."""
+    report = {"union_rows": int(len(times)),
+              "aligned_rows": int(np.logical_and.reduce(list(present.values())).sum()),
+              "symbols": {}}
+    for symbol, mask in present.items():
+        report["symbols"][symbol] = {
+            "rows": int(mask.sum()),
+            "missing": int((~mask).sum()),
+            "missing_ranges": _missing_ranges(times, ~mask, limit),
+        }
+    # ช่องว่างเวลาใหญ่สุดของ index รวม (วันหยุด / ข้อมูลหาย)
+    if len(times) > 1:
+        step = np.diff(times)
+        top = np.argsort(-step, kind="stable")[:limit]
+        report["largest_gaps"] = [(str(pd.Timestamp(int(times[k]))), str(pd.Timestamp(int(times[k + 1]))),
+                                   str(pd.Timedelta(int(step[k])))) for k in top]
+    return report
+
+
+def build_merged(tf, year=2024, symbols=("EURUSD", "GBPUSD"), fill="drop", data_dir=None, cache_dir=None):
+    """Align several symbols on one timestamp index and write the merged columns; returns the path."""
+    if fill not in FILL_POLICIES:
+        raise ValueError(f"fill must be one of {FILL_POLICIES}, got {fill!r}")
+    sources = {s: _symbol_csv(s, tf, year, data_dir) for s in symbols}
+    arrays = {s: load_arrays(path) for s, path in sources.items()}
+    times = np.unique(np.concatenate([np.asarray(a[INDEX_COL]) for a in arrays.values()]))
+
+    present, pos = {}, {}
+    for s, a in arrays.items():
+        own = np.asarray(a[INDEX_COL])
+        k = np.minimum(np.searchsorted(own, times), len(own) - 1)
+        present[s] = own[k] == times
+        if "close" in a:
+            present[s] &= ~np.isnan(np.asarray(a["close"])[k])
+        pos[s] = k
+    report = alignment_report(times, present)
+
+    if fill == "drop":
+        keep = np.logical_and.reduce(list(present.values()))
+    elif fill == "ffill":
+        first = max(int(np.argmax(m)) for m in present.values())
+        keep = np.arange(len(times)) >= first
+    else:
+        keep = np.ones(len(times), dtype=bool)
+
+    path = _merged_path(tf, year, symbols, fill, cache_dir, data_dir)
+    tmp = f"{path}.tmp{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    np.save(os.path.join(tmp, f"{INDEX_COL}.npy"), times[keep])
+    _save_day_index(tmp, times[keep])
+    fields = {}
+    for s, a in arrays.items():
+        fields[s] = [c for c in a if c != INDEX_COL]
+        have = present[s][keep]
+        src = pos[s][keep]
+        # แท่งที่ขาด: ffill ใช้แถวต้นทางของแท่งล่าสุดที่มีข้อมูล, nan เป็น NaN
+        prev = src[np.maximum(np.maximum.accumulate(np.where(have, np.arange(len(have)), -1)), 0)]
+        for col in fields[s]:
+            values = np.asarray(a[col], dtype=np.float64)[src]
+            if fill == "ffill":
+                if col == "volume":
+                    carry = np.zeros(len(values))
+                else:
+                    carry = np.asarray(a["close" if col in PRICE_FIELDS else col], dtype=np.float64)[prev]
+                values = np.where(have, values, carry)
+            elif fill == "nan":
+                values = np.where(have, values, np.nan)
+            np.save(os.path.join(tmp, f"{s}.{col}.npy"), values)
+    meta = {"tf": tf, "year": year, "symbols": list(symbols), "fields": fields, "fill": fill,
+            "data_dir": os.path.abspath(data_dir or DATA_DIR),
+            "rows": int(keep.sum()), "sources": {s: _source_stamp(p) for s, p in sources.items()},
+            "report": report}
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=1)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+    return path
+
+
+def ensure_merged(tf, year=2024, symbols=("EURUSD", "GBPUSD"), fill="drop", data_dir=None, cache_dir=None):
+    """Path of the merged store, rebuilt when any source CSV changed."""
+    path = _merged_path(tf, year, symbols, fill, cache_dir, data_dir)
+    meta = _read_meta(path)
+    if meta is None or any(meta["sources"].get(s) != _source_stamp(_symbol_csv(s, tf, year, data_dir))
+                           for s in symbols):
+        build_merged(tf, year, symbols, fill, data_dir, cache_dir)
+    return path
+
+
+def load_merged(tf, year=2024, symbols=("EURUSD", "GBPUSD"), field=None, fill="drop", data_dir=None,
+                cache_dir=None):
+    """Aligned columns of several symbols.
+
+    field="close" -> one column per symbol; field=None -> (symbol, field) MultiIndex columns.
+    """
+    symbols = tuple(symbols)
+    path = ensure_merged(tf, year, symbols, fill, data_dir, cache_dir)
+    meta = _read_meta(path)
+    index = pd.DatetimeIndex(np.load(os.path.join(path, f"{INDEX_COL}.npy")).view("datetime64[ns]"),
+                             name=INDEX_COL)
+    if field is not None:
+        cols = {s: np.load(os.path.join(path, f"{s}.{field}.npy"), mmap_mode="r") for s in symbols}
+    else:
+        cols = {(s, c): np.load(os.path.join(path, f"{s}.{c}.npy"), mmap_mode="r")
+                for s in symbols for c in meta["fields"][s]}
+    return pd.DataFrame({k: np.asarray(v) for k, v in cols.items()}, index=index, copy=False)
+
+
+def merged_report(tf, year=2024, symbols=("EURUSD", "GBPUSD"), fill="drop", data_dir=None, cache_dir=None):
+    """Gap / misalignment report of the merged store (built if needed)."""
+    return _read_meta(ensure_merged(tf, year, tuple(symbols), fill, data_dir, cache_dir))["report"]
+
+
+def load_pair(tf, year=2024, symbols=("EURUSD", "GBPUSD"), data_dir=None, fill="drop"):
+    """Close prices of several symbols aligned on common timestamps (same as the scripts' dropna join)."""
+    return load_merged(tf, year, symbols, "close", fill, data_dir)
+
+
+# === Per-day offset index ===
+# merged store แต่ละชุดมี days.npy (เที่ยงคืนของแต่ละวันที่มีแท่ง, int64 ns) + day_offsets.npy (แถวแรกของวัน, ปิดท้ายด้วยจำนวนแถว)
+# ขอช่วงเวลา -> หาแถวจาก index วัน แล้ว searchsorted เฉพาะในวันนั้น, memmap เฉพาะแถวที่ใช้ (+ warm-up)
+# ไม่ต้องโหลดทั้งปีแล้ว .loc ตัดเหมือนเดิม
+DAY_NS = 86_400 * 10**9
+
+
+def _save_day_index(path, times):
+    days = np.asarray(times, dtype=np.int64) // DAY_NS * DAY_NS
+    starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]]) if len(days) else np.empty(0, np.int64)
+    np.save(os.path.join(path, "days.npy"), days[starts])
+    np.save(os.path.join(path, "day_offsets.npy"), np.r_[starts, len(days)].astype(np.int64))
+
+
+def day_index(path):
+    """(days, offsets) of a merged store: rows of days[k] are offsets[k]:offsets[k + 1]."""
+    if not os.path.exists(os.path.join(path, "day_offsets.npy")):
+        _save_day_index(path, np.load(os.path.join(path, f"{INDEX_COL}.npy"), mmap_mode="r"))
+    return np.load(os.path.join(path, "days.npy")), np.load(os.path.join(path, "day_offsets.npy"))
+
+
+def _row(path, t, side):
+    # แถวแรกที่ time >= t (side="left") หรือ > t (side="right") ดูแค่แถวของวันนั้น
+    days, offsets = day_index(path)
+    k = int(np.searchsorted(days, t // DAY_NS * DAY_NS))
+    if k == len(days) or days[k] != t // DAY_NS * DAY_NS:
+        return int(offsets[k])
+    a, b = int(offsets[k]), int(offsets[k + 1])
+    times = np.load(os.path.join(path, f"{INDEX_COL}.npy"), mmap_mode="r")
+    return a + int(np.searchsorted(times[a:b], t, side=side))
+
+
+def _range_bounds(start, end):
+    # แบบ .loc[start:end]: end ที่เป็น string รวมทั้งช่วงตามความละเอียดของมัน
+    # ("2024" ทั้งปี, "2024-02" ทั้งเดือน, "2024-02-05" ทั้งวัน, "2024-02-05 13" ทั้งชั่วโมง)
+    lo = pd.Timestamp(start).value
+    hi = pd.Period(end).end_time if isinstance(end, str) else pd.Timestamp(end)
+    return lo, hi.value
+
+
+def load_range(tf, start, end, symbols=("EURUSD", "GBPUSD"), warmup=0, field="close", fill="drop",
+               data_dir=None, cache_dir=None):
+    """Aligned field of several symbols for start..end (inclusive, like .loc) plus `warmup` earlier bars.
+
+    Only the requested rows are read from the merged stores; years without data are
+    skipped. Warm-up continues into the year before the first loaded one while that
+    year has data. Raises FileNotFoundError when no year of the range has data.
+    """
+    symbols = tuple(symbols)
+    lo, hi = _range_bounds(start, end)
+    first, last = pd.Timestamp(lo).year, pd.Timestamp(hi).year
+    have = lambda y: all(os.path.exists(_symbol_csv(s, tf, y, data_dir)) for s in symbols)
+    years = [y for y in range(first, last + 1) if have(y)]
+    if not years:
+        raise FileNotFoundError(f"no {tf} data for {'/'.join(symbols)} between {start} and {end}")
+
+    parts = []
+    for year in years:
+        path = ensure_merged(tf, year, symbols, fill, data_dir, cache_dir)
+        a = _row(path, lo, "left") if year == first else 0
+        b = _row(path, hi, "right") if year == last else _read_meta(path)["rows"]
+        parts.append([path, a, b])
+    # warm-up: ถอยจากแถวแรกของช่วง ไม่พอก็ต่อท้ายปีก่อนหน้า (หยุดที่ปีที่ไม่มีข้อมูล)
+    take = min(warmup, parts[0][1])
+    parts[0][1] -= take
+    need, year = warmup - take, years[0]
+    while need > 0 and have(year - 1):
+        year -= 1
+        path = ensure_merged(tf, year, symbols, fill, data_dir, cache_dir)
+        rows = _read_meta(path)["rows"]
+        take = min(need, rows)
+        parts.insert(0, [path, rows - take, rows])
+        need -= take
+
+    index, cols = [], {s: [] for s in symbols}
+    for path, a, b in parts:
+        index.append(np.load(os.path.join(path, f"{INDEX_COL}.npy"), mmap_mode="r")[a:b])
+        for s in symbols:
+            cols[s].append(np.load(os.path.join(path, f"{s}.{field}.npy"), mmap_mode="r")[a:b])
+    times = np.concatenate(index)
+    return pd.DataFrame({s: np.concatenate(v) for s, v in cols.items()},
+                        index=pd.DatetimeIndex(times.view("datetime64[ns]"), name=INDEX_COL))
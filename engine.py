@@ -0,0 +1,254 @@
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+# === Array-based backtest kernel ===
+# ใช้แทน df.iterrows() : รับ numpy array (spread, zscore, corr) แล้วเดิน state machine
+# entry / partial exit / SL แบบเดียวกับ backtest_partial_noSL_withDD.py และ backtest_partial_sl30_full.py
+
+PIP = 10000
+ENGINE_VERSION = "2"   # เปลี่ยนทุกครั้งที่ logic ของ simulation เปลี่ยน -> result cache เก่าใช้ไม่ได้
+TRADE_COLUMNS = ["entry", "exit", "PnL", "holding_h", "equity", "tradeDD"]
+
+# exit reason codes (raw result["result"]); EXIT_END = บังคับปิดที่แท่งสุดท้าย (close_open=True)
+EXIT_TP, EXIT_SL, EXIT_ZSL, EXIT_END = 0, 1, 2, 3
+
+
+# === First-passage exit search ===
+# entry เกิดไม่บ่อยเทียบกับจำนวนแท่ง -> ไม่ต้องเดินทีละแท่ง
+# หา index ของแท่งที่ผ่านเงื่อนไขไว้ก่อน (|z| < tp2, |z| <= tp1, |z| >= z_sl, สัญญาณเข้า)
+# แล้วแต่ละไม้กระโดดไปแท่งแรกหลัง entry ด้วย searchsorted
+# SL เป็น pip (ขึ้นกับ entry_spread) -> เช็คเฉพาะช่วง entry..exit ตาม z แบบ vectorized
+def _first_after(idx, i, n):
+    k = idx.searchsorted(i, side="right")
+    return int(idx[k]) if k < len(idx) else n
+
+
+def simulate(spread, zscore, corr, z_threshold=2.0, corr_threshold=0.8,
+             tp1=1.0, tp2=0.1, SL=None, z_sl=None, cost=1.2, close_open=False):
+    """Run the partial-exit state machine over plain arrays.
+
+    Same trades as stepping the state machine bar by bar (the reference loop in
+    tests/test_engine.py), but each trade jumps straight to its exit, so the
+    Python work scales with the number of trades, not bars.
+    A trade still open at the last bar is dropped, or closed there at its
+    unrealized PnL (result EXIT_END) with close_open=True.
+    Returns a dict of numpy arrays, one row per closed trade:
+    entry_idx, exit_idx, PnL, tradeDD, result.
+    """
+    spread = np.asarray(spread, dtype=np.float64)
+    zscore = np.asarray(zscore, dtype=np.float64)
+    corr = np.asarray(corr, dtype=np.float64)
+    abs_z = np.abs(zscore)
+    with np.errstate(invalid="ignore"):
+        signal_idx = np.flatnonzero((abs_z > z_threshold) & (corr > corr_threshold))
+        tp1_idx = np.flatnonzero(abs_z <= tp1)
+        tp2_idx = np.flatnonzero(abs_z < tp2)
+        zsl_idx = np.flatnonzero(abs_z >= z_sl) if z_sl is not None else np.empty(0, np.int64)
+    return _first_passage(spread, zscore, signal_idx, tp1_idx, tp2_idx, zsl_idx, SL, cost, close_open)
+
+
+def _first_passage(spread, zscore, signal_idx, tp1_idx, tp2_idx, zsl_idx, SL, cost, close_open=False):
+    n = len(zscore)
+    entry_idx, exit_idx, pnl_out, dd_out, result = [], [], [], [], []
+    half_cost = cost / 2
+    i = _first_after(signal_idx, -1, n)
+    while i < n:
+        entry_z, entry_spread = float(zscore[i]), spread[i]
+        j_tp = _first_after(tp2_idx, i, n)
+        j_zsl = _first_after(zsl_idx, i, n)
+        bound = min(j_tp, j_zsl, n - 1)
+
+        # unrealized ของทุกแท่งใน (i, bound] สูตรเดียวกับ loop ทีละแท่ง
+        seg = spread[i + 1:bound + 1]
+        unreal = ((seg - entry_spread) if entry_z > 0 else (entry_spread - seg)) * PIP - cost
+        j_sl = n
+        if SL is not None:
+            hit = unreal <= -SL
+            k = int(hit.argmax()) if len(hit) else 0
+            if len(hit) and hit[k]:
+                j_sl = i + 1 + k
+        j = min(j_sl, j_zsl, j_tp)
+        if j < n:
+            reason = EXIT_SL if j == j_sl else EXIT_ZSL if j == j_zsl else EXIT_TP
+        elif close_open and i < n - 1:
+            j, reason = n - 1, EXIT_END   # บังคับปิดที่แท่งสุดท้าย
+        else:
+            break   # ไม้สุดท้ายยังไม่ปิด
+
+        worst_unreal = min(0.0, float(unreal[:j - i].min()))
+        j_partial = _first_after(tp1_idx, i, n)
+        partial_pnl = 0.0
+        # partial ที่แท่ง exit เอง: loop ทีละแท่งตัด partial ก่อนเช็ค tp2 / ปิดแท่งสุดท้าย
+        if j_partial < j or (j_partial == j and reason in (EXIT_TP, EXIT_END)):
+            partial_pnl = (abs(entry_z - float(zscore[j_partial])) * 10) / 2 - half_cost
+        if reason == EXIT_TP:
+            trade_pnl = partial_pnl + ((abs(entry_z - float(zscore[j])) * 10) / 2 - half_cost)
+        else:
+            trade_pnl = float(unreal[j - i - 1]) + partial_pnl
+
+        entry_idx.append(i)
+        exit_idx.append(j)
+        pnl_out.append(trade_pnl)
+        dd_out.append(worst_unreal)
+        result.append(reason)
+        i = _first_after(signal_idx, j, n)
+
+    return {
+        "entry_idx": np.asarray(entry_idx, dtype=np.int64),
+        "exit_idx": np.asarray(exit_idx, dtype=np.int64),
+        "PnL": np.asarray(pnl_out, dtype=np.float64),
+        "tradeDD": np.asarray(dd_out, dtype=np.float64),
+        "result": np.asarray(result, dtype=np.int8),
+    }
+
+
+def _column_indexes(mask):
+    # (bars, windows) mask -> sorted bar indexes ของแต่ละ column ด้วย nonzero ครั้งเดียว
+    n, k_cols = mask.shape
+    flat = np.flatnonzero(mask.T)   # column-major position = k * n + bar
+    bounds = np.searchsorted(flat, np.arange(k_cols + 1) * n)
+    return [flat[bounds[k]:bounds[k + 1]] - k * n for k in range(k_cols)]
+
+
+def simulate_windows(spread, zscore, corr, z_threshold=2.0, corr_threshold=0.8,
+                     tp1=1.0, tp2=0.1, SL=None, z_sl=None, cost=1.2, close_open=False):
+    """simulate() for every column of (bars x windows) zscore / corr matrices in one run.
+
+    spread is shared by all windows. Threshold crossings of all columns come from
+    one vectorized pass; returns a list of simulate() results, one per column.
+    """
+    spread = np.asarray(spread, dtype=np.float64)
+    zscore = np.asarray(zscore, dtype=np.float64)
+    corr = np.asarray(corr, dtype=np.float64)
+    abs_z = np.abs(zscore)
+    with np.errstate(invalid="ignore"):
+        signal = _column_indexes((abs_z > z_threshold) & (corr > corr_threshold))
+        tp1_idx = _column_indexes(abs_z <= tp1)
+        tp2_idx = _column_indexes(abs_z < tp2)
+        zsl_idx = (_column_indexes(abs_z >= z_sl) if z_sl is not None
+                   else [np.empty(0, np.int64)] * zscore.shape[1])
+    return [_first_passage(spread, zscore[:, k], signal[k], tp1_idx[k], tp2_idx[k], zsl_idx[k], SL, cost,
+                           close_open)
+            for k in range(zscore.shape[1])]
+
+
+def to_trade_log(index, res):
+    """Build the usual trade log DataFrame (entry, exit, PnL, holding_h, equity, tradeDD)."""
+    index = pd.DatetimeIndex(index)
+    entry = index[res["entry_idx"]]
+    exit_ = index[res["exit_idx"]]
+    return pd.DataFrame({
+        "entry": entry,
+        "exit": exit_,
+        "PnL": res["PnL"],
+        "holding_h": (exit_ - entry).total_seconds().to_numpy() / 3600,
+        "equity": np.cumsum(res["PnL"]),
+        "tradeDD": res["tradeDD"],
+    }, columns=TRADE_COLUMNS)
+
+
+def backtest_partial(df, **params):
+    """Run simulate() on a frame with spread / zscore / corr columns and return the trade log."""
+    res = simulate(df["spread"].to_numpy(), df["zscore"].to_numpy(), df["corr"].to_numpy(), **params)
+    return to_trade_log(df.index, res)
+
+
+def as_ns(times):
+    """Timestamps (DatetimeIndex / datetime64 / int64 ns) as an int64 ns array."""
+    times = np.asarray(times)
+    if times.dtype.kind == "M":
+        return times.astype("datetime64[ns]").view(np.int64)
+    return times.astype(np.int64, copy=False)
+
+
+def trade_stats(res, times):
+    """Summary stats straight from simulate() output; times = int64 ns timestamps of the bars."""
+    pnl = res["PnL"]
+    if len(pnl) == 0:
+        return {"Trades": 0, "Total PnL": 0.0, "Win rate": 0.0, "Avg PnL": 0.0,
+                "Max DD": 0.0, "Max In-trade DD": 0.0, "Avg Hold": 0.0}
+    times = as_ns(times)
+    equity = np.cumsum(pnl)
+    hold = (times[res["exit_idx"]] - times[res["entry_idx"]]) / 3.6e12
+    return {
+        "Trades": len(pnl),
+        "Total PnL": float(equity[-1]),
+        "Win rate": float((pnl > 0).mean()),
+        "Avg PnL": float(pnl.mean()),
+        "Max DD": float((np.maximum.accumulate(equity) - equity).max()),
+        "Max In-trade DD": float(res["tradeDD"].min()),
+        "Avg Hold": float(hold.mean()),
+    }
+
+
+# === Multi-target evaluation (one pass, many TP levels) ===
+# entry เหมือนกันทุก target ต่างกันแค่ exit (|z| <= tp หรือ |z| >= z_sl)
+# target ที่ว่างอยู่ตอนมีสัญญาณจะเข้าพร้อมกัน -> รวมเป็น cohort เดียว (entry เดียวกัน)
+# แต่ละแท่งเช็คแค่ cohort ที่เปิดอยู่: target ที่ tp >= |z| ออกพร้อมกัน (ตัดท้าย list ที่เรียง tp ไว้)
+LEG_COLUMNS = ["entry_time", "exit_time", "side", "entry_z", "exit_z", "eur_pnl", "gbp_pnl", "net_pnl", "result"]
+
+
+def simulate_multi_target(index, eur, gbp, zscore, corr, tp_targets, z_threshold=2.0,
+                          corr_threshold=0.8, z_sl=3.0, cost=3.5):
+    """Full-exit, leg-PnL backtest (as in ิbacktestmultitaget.py) for every TP target in one scan.
+
+    Returns {tp: trades DataFrame with LEG_COLUMNS}.
+    """
+    eur = np.asarray(eur, dtype=np.float64).tolist()
+    gbp = np.asarray(gbp, dtype=np.float64).tolist()
+    zscore = np.asarray(zscore, dtype=np.float64).tolist()
+    corr = np.asarray(corr, dtype=np.float64).tolist()
+    tps = sorted(tp_targets)
+    logs = {tp: [] for tp in tps}
+
+    flat = list(tps)   # targets ที่ไม่มี position (เรียง tp น้อย -> มาก)
+    cohorts = []       # [entry_i, side, eur_entry, gbp_entry, entry_z, tps ที่ยังถืออยู่]
+    for i in range(len(zscore)):
+        z = zscore[i]
+        a = abs(z)
+        entering, flat = flat, []
+
+        still_open = []
+        for c in cohorts:
+            held = c[5]
+            if a >= z_sl:
+                cut = 0
+            elif a <= held[-1]:
+                cut = bisect_left(held, a)   # tp >= |z| -> ออก
+            else:
+                cut = len(held)              # ยังไม่มีใครถึง TP (รวมกรณี z เป็น NaN)
+            if cut < len(held):
+                entry_i, side, eur_entry, gbp_entry, entry_z = c[:5]
+                if side == "long":
+                    eur_pnl = (eur[i] - eur_entry) / 0.0001
+                    gbp_pnl = (gbp_entry - gbp[i]) / 0.0001
+                else:
+                    eur_pnl = (eur_entry - eur[i]) / 0.0001
+                    gbp_pnl = (gbp[i] - gbp_entry) / 0.0001
+                net_pnl = eur_pnl + gbp_pnl - cost
+                for tp in held[cut:]:
+                    logs[tp].append((entry_i, i, side, entry_z, z, eur_pnl, gbp_pnl, net_pnl,
+                                     "TP" if a <= tp else "SL"))
+                flat.extend(held[cut:])
+                c[5] = held[:cut]
+            if c[5]:
+                still_open.append(c)
+        cohorts = still_open
+
+        if entering:
+            if corr[i] > corr_threshold and (z > z_threshold or z < -z_threshold):
+                cohorts.append([i, "short" if z > z_threshold else "long", eur[i], gbp[i], z, entering])
+            else:
+                flat.extend(entering)
+        flat.sort()
+
+    index = pd.DatetimeIndex(index)
+    out = {}
+    for tp, rows in logs.items():
+        trades = pd.DataFrame(rows, columns=LEG_COLUMNS)
+        trades["entry_time"] = index[trades["entry_time"].to_numpy(np.int64)]
+        trades["exit_time"] = index[trades["exit_time"].to_numpy(np.int64)]
+        out[tp] = trades
+    return out
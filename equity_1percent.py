@@ -1,5 +1,6 @@
 import pandas as pd
 import matplotlib.pyplot as plt
+from report import show
 
 # โหลด trade log ที่มี PnL (pips) และ in-trade DD (pips)
 trades = pd.read_csv("trade_log_partial_noSL.csv")
@@ -49,4 +50,4 @@ plt.ylabel("USD")
 plt.xlabel("Trades")
 plt.legend()
 plt.grid(True, alpha=0.3)
-plt.show()
+show()
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+from engine import PIP, to_trade_log
+
+# === Post-trade excursion analytics ===
+# ทุกไม้ต่อกันเป็น array เดียว (แท่ง entry+1 .. exit ของแต่ละไม้) แล้วใช้ reduceat หา
+# MAE / MFE / เวลาถึง MAE ของทุกไม้พร้อมกัน ไม่ต้องอัปเดต worst_unreal ทีละแท่งใน loop
+# unrealized สูตรเดียวกับ engine.simulate : ทิศตาม sign ของ entry z, หัก cost เต็มรอบ, ขนาดเต็มไม้
+
+EXCURSION_COLUMNS = ["MAE", "MFE", "bars_to_MAE", "bars_to_MFE"]
+
+
+def _segments(entry_idx, exit_idx):
+    # แท่งใน (entry, exit] ของทุกไม้ต่อกัน + จุดเริ่มของแต่ละไม้ใน array นั้น
+    entry_idx = np.asarray(entry_idx, dtype=np.int64)
+    lengths = np.asarray(exit_idx, dtype=np.int64) - entry_idx
+    starts = np.zeros(len(lengths), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    bars = np.arange(lengths.sum(), dtype=np.int64) + np.repeat(entry_idx + 1 - starts, lengths)
+    return bars, starts, lengths
+
+
+def _unrealized(spread, zscore, entry_idx, bars, lengths, cost):
+    spread = np.asarray(spread, dtype=np.float64)
+    entry_idx = np.asarray(entry_idx, dtype=np.int64)
+    side = np.where(np.asarray(zscore, dtype=np.float64)[entry_idx] > 0, 1.0, -1.0)
+    move = (spread[bars] - np.repeat(spread[entry_idx], lengths)) * np.repeat(side, lengths)
+    return move * PIP - cost
+
+
+def _first_hit(values, target, starts, lengths):
+    # ตำแหน่งแรกในแต่ละไม้ที่ values == target ของไม้นั้น (นับจากแท่งหลัง entry = 1)
+    pos = np.arange(len(values)) - np.repeat(starts, lengths)
+    hit = np.where(values == np.repeat(target, lengths), pos, len(values))
+    return np.minimum.reduceat(hit, starts) + 1
+
+
+def trade_excursions(spread, zscore, res, cost=1.2):
+    """MAE / MFE (pips) and bars to reach them for every trade of a simulate() result.
+
+    MAE matches the engine's tradeDD (worst unrealized, capped at 0); MFE is the
+    best unrealized, floored at 0.
+    """
+    entry_idx, exit_idx = res["entry_idx"], res["exit_idx"]
+    if len(entry_idx) == 0:
+        return {col: np.empty(0) for col in EXCURSION_COLUMNS}
+    bars, starts, lengths = _segments(entry_idx, exit_idx)
+    unreal = _unrealized(spread, zscore, entry_idx, bars, lengths, cost)
+    low = np.minimum.reduceat(unreal, starts)
+    high = np.maximum.reduceat(unreal, starts)
+    return {
+        "MAE": np.minimum(low, 0.0),
+        "MFE": np.maximum(high, 0.0),
+        "bars_to_MAE": _first_hit(unreal, low, starts, lengths),
+        "bars_to_MFE": _first_hit(unreal, high, starts, lengths),
+    }
+
+
+def floating_equity(spread, zscore, res, cost=1.2):
+    """Bar-level equity in pips: closed PnL plus the open trade's unrealized PnL.
+
+    Returns (closed, floating) arrays with one value per bar; closed steps at exit bars.
+    """
+    n = len(spread)
+    closed = np.zeros(n)
+    np.add.at(closed, res["exit_idx"], res["PnL"])
+    np.cumsum(closed, out=closed)
+    floating = closed.copy()
+    if len(res["entry_idx"]):
+        bars, starts, lengths = _segments(res["entry_idx"], res["exit_idx"])
+        unreal = _unrealized(spread, zscore, res["entry_idx"], bars, lengths, cost)
+        open_bar = np.ones(len(bars), dtype=bool)
+        open_bar[starts + lengths - 1] = False   # แท่ง exit = ปิดแล้ว ใช้ closed
+        floating[bars[open_bar]] += unreal[open_bar]
+    return closed, floating
+
+
+def excursion_log(index, spread, zscore, res, cost=1.2):
+    """Trade log (engine.to_trade_log) with MAE / MFE columns; times to MAE / MFE in hours."""
+    trades = to_trade_log(index, res)
+    exc = trade_excursions(spread, zscore, res, cost)
+    index = pd.DatetimeIndex(index)
+    entry = np.asarray(res["entry_idx"], dtype=np.int64)
+    trades["MAE"], trades["MFE"] = exc["MAE"], exc["MFE"]
+    for col in ("MAE", "MFE"):
+        reached = index[entry + exc[f"bars_to_{col}"].astype(np.int64)] if len(entry) else index[:0]
+        trades[f"hours_to_{col}"] = (reached - index[entry]).total_seconds().to_numpy() / 3600
+    return trades
+
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
+    from datastore import load_pair
+    from engine import simulate
+    from indicators import make_indicators
+    from report import show
+
+    df = make_indicators(load_pair("H1"), 50)
+    params = dict(z_threshold=2.0, corr_threshold=0.8, cost=1.2)
+    spread, zscore = df["spread"].to_numpy(), df["zscore"].to_numpy()
+    res = simulate(spread, zscore, df["corr"].to_numpy(), **params)
+
+    trades = excursion_log(df.index, spread, zscore, res, params["cost"])
+    print(trades[["PnL", "MAE", "MFE", "hours_to_MAE", "hours_to_MFE"]].describe().round(2).to_string())
+
+    closed, floating = floating_equity(spread, zscore, res, params["cost"])
+    dd = floating - np.maximum.accumulate(floating)
+    print(f"Max DD incl. floating: {dd.min():.2f} pips (closed-only: "
+          f"{(closed - np.maximum.accumulate(closed)).min():.2f} pips)")
+
+    fig, ax = plt.subplots(2, 1, figsize=(12, 8), sharex=True)
+    ax[0].plot(df.index, closed, label="Closed equity")
+    ax[0].plot(df.index, floating, label="Equity incl. floating", alpha=0.7)
+    ax[0].set_ylabel("Pips")
+    ax[0].legend()
+    ax[1].fill_between(df.index, dd, 0, color="red", alpha=0.4, label="Floating DD")
+    ax[1].set_ylabel("Pips")
+    ax[1].legend()
+    plt.tight_layout()
+    show()
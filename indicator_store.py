@@ -0,0 +1,116 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from datastore import CACHE_DIR
+from engine import as_ns
+from indicators import make_indicators, rolling_pair_matrix
+
+# === Memoized indicator store ===
+# key = (pair, timeframe, window, data fingerprint) -> spread / zscore / corr arrays
+# get_matrix: หลาย window พร้อมกัน (bars x windows) ตัวที่ยังไม่มีคำนวณด้วย rolling_pair_matrix
+# get / get_matrix ได้ค่าเดียวกันทุก bit (ตาราง block ของ kernel ขึ้นกับ window อย่างเดียว) -> ใช้ key ร่วมกันได้
+# เก็บใน memory แบบ LRU และ (ถ้าตั้ง disk_dir) เซฟเป็น .npz ไว้ใช้ข้าม run
+
+INDICATOR_COLUMNS = ("spread", "zscore", "corr")
+INDICATOR_DIR = os.path.join(CACHE_DIR, "indicators")
+INDICATOR_VERSION = "2"   # เปลี่ยนเมื่อตัวเลขของ kernel เปลี่ยน -> ไฟล์ .npz เก่าไม่ถูกใช้
+
+
+def data_fingerprint(df, columns=("EURUSD", "GBPUSD")):
+    """Hash of the timestamps and leg prices; changes whenever the data does."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(as_ns(df.index).tobytes())
+    for col in columns:
+        h.update(np.ascontiguousarray(df[col].to_numpy(np.float64)).tobytes())
+    return h.hexdigest()
+
+
+class IndicatorStore:
+    """LRU cache of indicator columns, optionally persisted to disk."""
+
+    def __init__(self, max_items=32, disk_dir=None):
+        self.max_items = max_items
+        self.disk_dir = disk_dir
+        self.items = OrderedDict()
+        self.hits = self.misses = 0
+
+    def _path(self, key):
+        pair, tf, window, fp = key
+        return os.path.join(self.disk_dir, f"{'-'.join(pair)}_{tf}_w{window}_{fp}_v{INDICATOR_VERSION}.npz")
+
+    def _remember(self, key, arrays):
+        self.items[key] = arrays
+        self.items.move_to_end(key)
+        while len(self.items) > self.max_items:
+            self.items.popitem(last=False)
+
+    def _lookup(self, key):
+        # memory -> disk; None ถ้ายังไม่เคยคำนวณ
+        if key in self.items:
+            self.items.move_to_end(key)
+            return self.items[key]
+        if self.disk_dir and os.path.exists(self._path(key)):
+            with np.load(self._path(key)) as f:
+                arrays = {col: f[col] for col in INDICATOR_COLUMNS}
+            self._keep(key, arrays, save=False)
+            return arrays
+        return None
+
+    def _keep(self, key, arrays, save=True):
+        if save and self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            tmp = f"{self._path(key)}.tmp{os.getpid()}.npz"
+            np.savez(tmp, **arrays)
+            os.replace(tmp, self._path(key))
+        for arr in arrays.values():
+            arr.flags.writeable = False   # ใช้ร่วมกันหลาย run ห้ามแก้ in-place
+        self._remember(key, arrays)
+
+    def get(self, df, window, tf="", pair=("EURUSD", "GBPUSD"), fingerprint=None):
+        """spread / zscore / corr for df (columns = pair legs), computed at most once per key."""
+        key = (tuple(pair), tf, window, fingerprint or data_fingerprint(df, pair))
+        arrays = self._lookup(key)
+        if arrays is not None:
+            self.hits += 1
+            return arrays
+
+        self.misses += 1
+        legs = df[list(pair)].copy()
+        legs.columns = ["EURUSD", "GBPUSD"]   # make_indicators ใช้ชื่อคอลัมน์นี้
+        ind = make_indicators(legs, window)
+        arrays = {col: ind[col].to_numpy(np.float64) for col in INDICATOR_COLUMNS}
+        self._keep(key, arrays)
+        return arrays
+
+    def get_matrix(self, df, windows, tf="", pair=("EURUSD", "GBPUSD"), fingerprint=None):
+        """spread plus (bars x windows) zscore / corr; missing windows computed in one call."""
+        windows = list(windows)
+        fp = fingerprint or data_fingerprint(df, pair)
+        found = {w: self._lookup((tuple(pair), tf, w, fp)) for w in windows}
+        missing = [w for w in windows if found[w] is None]
+        self.hits += len(windows) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            ind = rolling_pair_matrix(df[pair[0]].to_numpy(), df[pair[1]].to_numpy(), missing)
+            for k, w in enumerate(missing):
+                found[w] = {"spread": ind["spread"], "zscore": ind["zscore"][:, k], "corr": ind["corr"][:, k]}
+                self._keep((tuple(pair), tf, w, fp), found[w])
+
+        n = len(df)
+        out = {"spread": found[windows[0]]["spread"],
+               "zscore": np.empty((n, len(windows)), order="F"),
+               "corr": np.empty((n, len(windows)), order="F")}
+        for k, w in enumerate(windows):
+            out["zscore"][:, k] = found[w]["zscore"]
+            out["corr"][:, k] = found[w]["corr"]
+        return out
+
+    def clear(self):
+        self.items.clear()
+
+
+# store กลางสำหรับสคริปต์ทั่วไป (memory อย่างเดียว)
+default_store = IndicatorStore()
@@ -0,0 +1,307 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+# === Incremental rolling z-score / correlation ===
+# อัปเดตทีละแท่ง O(1) : ring buffer + running mean / co-moment (Welford แบบ sliding window)
+# ใช้ตอน live ไม่ต้อง rolling ย้อนทั้งปีทุก tick
+# ผลตรงกับ pandas:
+#   spread.rolling(window).mean() / .std()  และ  EURUSD.rolling(window).corr(GBPUSD)
+
+RESYNC_EVERY = 10_000   # คำนวณ sums ใหม่จาก buffer เป็นระยะ กัน floating error สะสม
+
+
+class RollingPairStats:
+    """Rolling spread z-score and leg correlation, updated one bar at a time."""
+
+    def __init__(self, window):
+        self.window = window
+        self.buf_x = [0.0] * window
+        self.buf_y = [0.0] * window
+        self.pos = 0
+        self.n = 0            # แท่งที่อยู่ใน sums (เฉพาะค่าจริง)
+        self.filled = 0       # แท่งใน buffer รวม NaN
+        self.bad = 0          # NaN / inf ใน window -> ผลเป็น NaN จนกว่าจะหลุด window (เหมือน pandas)
+        self.updates = 0
+        self.ref_x = self.ref_y = None   # ราคาอ้างอิง (แท่งแรก) ลบออกก่อนสะสม ลด cancellation error
+        # running means และ co-moments ของ x (EURUSD), y (GBPUSD), s (spread = x - y)
+        self.mx = self.my = self.ms = 0.0
+        self.cxx = self.cyy = self.cxy = self.css = 0.0
+
+    def _add(self, x, y):
+        self.n += 1
+        dx = x - self.mx
+        dy = y - self.my
+        self.mx += dx / self.n
+        self.my += dy / self.n
+        self.cxx += dx * (x - self.mx)
+        self.cyy += dy * (y - self.my)
+        self.cxy += dx * (y - self.my)
+        ds = (x - y) - self.ms
+        self.ms += ds / self.n
+        self.css += ds * ((x - y) - self.ms)
+
+    def _remove(self, x, y):
+        if self.n == 1:
+            self.n, self.mx, self.my, self.ms = 0, 0.0, 0.0, 0.0
+            self.cxx = self.cyy = self.cxy = self.css = 0.0
+            return
+        self.n -= 1
+        dx = x - self.mx
+        dy = y - self.my
+        self.mx -= dx / self.n
+        self.my -= dy / self.n
+        self.cxx -= dx * (x - self.mx)
+        self.cyy -= dy * (y - self.my)
+        self.cxy -= dx * (y - self.my)
+        ds = (x - y) - self.ms
+        self.ms -= ds / self.n
+        self.css -= ds * ((x - y) - self.ms)
+
+    def _resync(self):
+        self.n, self.mx, self.my, self.ms = 0, 0.0, 0.0, 0.0
+        self.cxx = self.cyy = self.cxy = self.css = 0.0
+        start = (self.pos - self.filled) % self.window
+        for k in range(self.filled):
+            j = (start + k) % self.window
+            if math.isfinite(self.buf_x[j]) and math.isfinite(self.buf_y[j]):
+                self._add(self.buf_x[j], self.buf_y[j])
+
+    def update(self, x, y):
+        """Push one bar (EURUSD close, GBPUSD close); returns (spread, zscore, corr)."""
+        spread = x - y
+        finite = math.isfinite(x) and math.isfinite(y)
+        if self.ref_x is None and finite:
+            self.ref_x, self.ref_y = x, y
+        if finite:
+            x -= self.ref_x
+            y -= self.ref_y
+        else:
+            x = y = math.nan
+        if self.filled == self.window:
+            old_x, old_y = self.buf_x[self.pos], self.buf_y[self.pos]
+            if math.isnan(old_x):
+                self.bad -= 1
+            else:
+                self._remove(old_x, old_y)
+        else:
+            self.filled += 1
+        self.buf_x[self.pos] = x
+        self.buf_y[self.pos] = y
+        self.pos = (self.pos + 1) % self.window
+        if finite:
+            self._add(x, y)
+        else:
+            self.bad += 1
+
+        self.updates += 1
+        if self.updates % RESYNC_EVERY == 0:
+            self._resync()
+        return self.value(spread)
+
+    def value(self, spread):
+        if self.n < self.window or self.window < 2 or not math.isfinite(spread):
+            return spread, math.nan, math.nan
+        std_s = math.sqrt(max(self.css, 0.0) / (self.n - 1))
+        z = (spread - (self.ms + self.ref_x - self.ref_y)) / std_s if std_s > 0 else math.nan
+        denom = math.sqrt(self.cxx * self.cyy) if self.cxx > 0 and self.cyy > 0 else 0.0
+        corr = self.cxy / denom if denom > 0 else math.nan
+        return spread, z, corr
+
+
+def replay(eur, gbp, window):
+    """Feed two close arrays through RollingPairStats; returns spread, zscore, corr arrays."""
+    stats = RollingPairStats(window)
+    out = np.array([stats.update(x, y) for x, y in zip(np.asarray(eur, dtype=np.float64).tolist(),
+                                                        np.asarray(gbp, dtype=np.float64).tolist())])
+    out = out.reshape(-1, 3)
+    return out[:, 0], out[:, 1], out[:, 2]
+
+
+# === Fused batch kernel ===
+# spread mean / std / zscore + corr ของสองขา จาก cumulative sums รอบเดียว (แทน rolling 3 รอบ)
+# ทำทีละ block (+ window-1 แท่ง overlap) และ center ค่าต่อ block -> temp array ขนาด block ไม่ใช่ทั้งก้อน
+# และ error ของ cumsum ไม่สะสมยาวตลอดประวัติ
+# ตำแหน่ง block ขึ้นกับ window เท่านั้น -> ค่าเดียวกันทุก bit ไม่ว่าจะคำนวณ window เดียวหรือเป็น matrix
+# window ที่มี NaN อยู่ได้ NaN (เหมือน pandas rolling min_periods=window)
+KERNEL_BLOCK = 1 << 13
+ZERO_TOL_ULPS = 8   # dev ที่เล็กกว่า ZERO_TOL_ULPS * eps * จำนวนเทอม * max|ค่า| / window = เศษ rounding
+
+
+def snap_zero(dev, values, terms, window):
+    """Set deviations from a rolling mean to exactly 0 where they are cumsum rounding.
+
+    A window mean taken as a difference of prefix sums over `terms` values is off by
+    at most about terms * eps * max|values| / window; anything within ZERO_TOL_ULPS
+    times that is treated as spread == mean, so |z| <= 0.0 targets trigger on it.
+    values may be 2-D (bars x columns): the bound is taken per column.
+    """
+    bound = ZERO_TOL_ULPS * np.finfo(np.float64).eps * terms * np.abs(values).max(axis=0) / window
+    dev[np.abs(dev) <= bound] = 0.0
+    return dev
+
+
+def _window_sums(c, window, lo):
+    # c = prefix sums (c[0] = 0) ของ block -> sum ของ window ที่จบที่แท่ง lo .. ปลาย block
+    return c[lo + window:] - c[lo:len(c) - window]
+
+
+def _pair_column(x, y, w, zscore, corr, block):
+    # ตาราง block ของ window นี้เอง: block แรกเริ่มที่ w-1, center / prefix sums บน [start-w+1, end)
+    # -> ค่าแต่ละ window ไม่ขึ้นกับว่าคำนวณคู่กับ window อื่นหรือไม่
+    n = len(x)
+    zscore[:w - 1] = np.nan
+    corr[:w - 1] = np.nan
+    for start in range(max(w - 1, 0), n, block):
+        end = min(start + block, n)
+        lo = max(start - w + 1, 0)
+        xs, ys = x[lo:end], y[lo:end]
+        bad = np.isnan(xs) | np.isnan(ys)
+        a = np.where(bad, 0.0, xs)
+        b = np.where(bad, 0.0, ys)
+        a -= a.mean()
+        b -= b.mean()
+        s = a - b
+
+        cums = {}
+        for name, v in (("a", a), ("b", b), ("s", s), ("aa", a * a), ("bb", b * b),
+                        ("ab", a * b), ("ss", s * s), ("bad", bad.astype(np.float64))):
+            c = np.empty(len(v) + 1)
+            c[0] = 0.0
+            np.cumsum(v, out=c[1:])
+            cums[name] = c
+
+        off = start - w + 1 - lo
+        sa, sb, ss = (_window_sums(cums[v], w, off) for v in ("a", "b", "s"))
+        saa, sbb, sab, sss = (_window_sums(cums[v], w, off) for v in ("aa", "bb", "ab", "ss"))
+        nan_count = _window_sums(cums["bad"], w, off)
+
+        # spread == mean พอดี (ราคา 5 ตำแหน่ง) ให้ได้ 0 จริง ไม่ใช่เศษ rounding ของ cumsum -> TP=0.0 ตัดสินตรง
+        dev = snap_zero(s[start - lo:] - ss / w, s, len(s), w)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var_s = np.maximum(sss - ss * ss / w, 0.0) / (w - 1)
+            z = dev / np.sqrt(var_s)
+            cov = sab - sa * sb / w
+            var_a = np.maximum(saa - sa * sa / w, 0.0)
+            var_b = np.maximum(sbb - sb * sb / w, 0.0)
+            c = cov / np.sqrt(var_a * var_b)
+        z[nan_count > 0.5] = np.nan
+        c[nan_count > 0.5] = np.nan
+        zscore[start:end] = z
+        corr[start:end] = c
+
+
+def rolling_pair_matrix(x, y, windows, out=None, block=KERNEL_BLOCK):
+    """spread plus zscore / corr for several windows in one call.
+
+    Returns {"spread": (bars,), "zscore": (bars, windows), "corr": (bars, windows)};
+    column k is bit-identical to rolling_pair_kernel(x, y, windows[k]).
+    out: optional dict of preallocated arrays with those shapes.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    windows = [int(w) for w in windows]
+    n = len(x)
+    if out is None:
+        # column-major -> แต่ละ window เป็น array ต่อเนื่อง ส่งเข้า engine ได้เลย
+        out = {"spread": np.empty(n),
+               "zscore": np.empty((n, len(windows)), order="F"),
+               "corr": np.empty((n, len(windows)), order="F")}
+    np.subtract(x, y, out=out["spread"])
+    for k, w in enumerate(windows):
+        _pair_column(x, y, w, out["zscore"][:, k], out["corr"][:, k], block)
+    return out
+
+
+def rolling_pair_kernel(x, y, window, out=None, block=KERNEL_BLOCK):
+    """spread, zscore and corr of two close arrays in one fused pass.
+
+    Matches spread.rolling(window).mean()/.std() and x.rolling(window).corr(y).
+    out: optional dict of preallocated float64 arrays "spread", "zscore", "corr".
+    """
+    n = len(x)
+    if out is None:
+        out = {col: np.empty(n) for col in ("spread", "zscore", "corr")}
+    views = {"spread": out["spread"], "zscore": out["zscore"].reshape(n, 1),
+             "corr": out["corr"].reshape(n, 1)}
+    rolling_pair_matrix(x, y, [window], views, block)
+    return out
+
+
+class StreamingPairKernel:
+    """rolling_pair_kernel fed chunk by chunk (e.g. one partition at a time).
+
+    Keeps only the last window-1 bars plus the current block in memory and cuts
+    blocks at the same bar positions as a single full-history call, so the
+    output is bit-identical to rolling_pair_kernel on the concatenated data.
+    """
+
+    def __init__(self, window, block=KERNEL_BLOCK, start=0):
+        """start: global bar index of the first pushed bar (resume mid-history).
+
+        With start > 0 output begins at the first block whose inputs are all pushed,
+        so feed from a multiple of block to get every bar from start + window - 1 on.
+        """
+        self.window, self.block = window, block
+        self.buf_x = np.empty(0)
+        self.buf_y = np.empty(0)
+        self.buf_start = start                      # global bar ของ buf[0]
+        self.next_start = max(window - 1, 0)        # แท่งแรกของ block ถัดไป (global)
+        if start > 0:
+            self.next_start += -(-start // block) * block
+        self.emitted = self.next_start if start > 0 else 0   # ส่งออกไปแล้วถึงแท่งนี้ (global)
+
+    def _run(self, end):
+        lo = max(self.next_start - self.window + 1, 0)
+        a, b = lo - self.buf_start, end - self.buf_start
+        out = rolling_pair_kernel(self.buf_x[a:b], self.buf_y[a:b], self.window, block=self.block)
+        out = {col: arr[self.emitted - lo:] for col, arr in out.items()}
+        self.emitted = self.next_start = end
+        keep = max(end - self.window + 1, 0) - self.buf_start
+        self.buf_x, self.buf_y = self.buf_x[keep:], self.buf_y[keep:]
+        self.buf_start += keep
+        return out
+
+    def _concat(self, parts):
+        if not parts:
+            return {col: np.empty(0) for col in ("spread", "zscore", "corr")}
+        return {col: np.concatenate([p[col] for p in parts]) for col in parts[0]}
+
+    def push(self, x, y):
+        """Add bars; returns spread / zscore / corr for every bar whose block is now complete."""
+        self.buf_x = np.concatenate([self.buf_x, np.asarray(x, dtype=np.float64)])
+        self.buf_y = np.concatenate([self.buf_y, np.asarray(y, dtype=np.float64)])
+        parts = []
+        while self.buf_start + len(self.buf_x) >= self.next_start + self.block:
+            parts.append(self._run(self.next_start + self.block))
+        return self._concat(parts)
+
+    def flush(self):
+        """Indicators of the remaining bars (end of data)."""
+        end = self.buf_start + len(self.buf_x)
+        return self._concat([self._run(end)] if end > self.emitted else [])
+
+
+def make_indicators(df, window):
+    """Batch spread / zscore / corr columns on a EURUSD, GBPUSD frame (fused kernel)."""
+    ind = rolling_pair_kernel(df["EURUSD"].to_numpy(), df["GBPUSD"].to_numpy(), window)
+    for col, arr in ind.items():
+        df[col] = arr
+    return df
+
+
+def indicator_matrix(df, windows):
+    """zscore and corr DataFrames (bars x windows, columns = window) on a EURUSD, GBPUSD frame."""
+    ind = rolling_pair_matrix(df["EURUSD"].to_numpy(), df["GBPUSD"].to_numpy(), windows)
+    return (pd.DataFrame(ind["zscore"], index=df.index, columns=list(windows)),
+            pd.DataFrame(ind["corr"], index=df.index, columns=list(windows)))
+
+
+def signal_view(tf, start, end, window, symbols=("EURUSD", "GBPUSD"), data_dir=None):
+    """make_indicators for start..end only: reads the range plus `window` warm-up bars via the day index."""
+    from datastore import load_range
+
+    df = load_range(tf, start, end, symbols, warmup=window, data_dir=data_dir)
+    lead = len(df) - len(df.loc[start:end])
+    return make_indicators(df, window).iloc[lead:]
@@ -0,0 +1,141 @@
+import os
+import re
+
+import pandas as pd
+
+from datastore import build_merged, merged_report
+from partitions import build_partitions
+
+# === Streaming ingest of HistData M1 files ===
+# อ่านไฟล์ M1 (semicolon) ทีละ chunk แล้ว resample ออกทุก TF ในรอบเดียว
+# แท่งสุดท้ายของแต่ละ chunk ยังไม่ครบ -> เก็บไว้ (carry) แล้วไปรวมกับ chunk ถัดไป
+# จบแล้วสร้าง merged store (ทุก symbol บน timestamp เดียวกัน) ของแต่ละ TF / ปี พร้อม gap report
+
+TIMEFRAMES = {"M5": "5min", "M15": "15min", "H1": "1h", "H4": "4h", "D1": "1D"}
+HIST_COLUMNS = ["datetime", "open", "high", "low", "close", "volume"]
+OHLCV_AGG = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+CHUNK_ROWS = 500_000
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"   # เขียนเวลาเต็มเสมอ (chunk ที่มีแต่ 00:00 จะได้แค่วันที่)
+
+_SYMBOL_RE = re.compile(r"([A-Z]{6})_M1_")
+
+
+def find_m1_files(data_dir):
+    """Group HistData M1 files by symbol: {"EURUSD": [path_2023, path_2024, ...], ...}."""
+    files = {}
+    for fname in sorted(os.listdir(data_dir)):
+        m = _SYMBOL_RE.search(fname.upper())
+        if fname.lower().endswith(".csv") and m:
+            files.setdefault(m.group(1), []).append(os.path.join(data_dir, fname))
+    return files
+
+
+def read_histdata_chunks(filepath, chunk_rows=CHUNK_ROWS):
+    for chunk in pd.read_csv(filepath, sep=";", header=None, names=HIST_COLUMNS,
+                             chunksize=chunk_rows):
+        chunk["datetime"] = pd.to_datetime(chunk["datetime"], format="%Y%m%d %H%M%S")
+        yield chunk.set_index("datetime")
+
+
+def _merge_bar(carry, head):
+    # รวมแท่งที่ถูกตัดกลาง chunk (carry = ส่วนแรก, head = ส่วนหลัง)
+    return pd.DataFrame({
+        "open": carry["open"].to_numpy(),
+        "high": [max(carry["high"].iat[0], head["high"].iat[0])],
+        "low": [min(carry["low"].iat[0], head["low"].iat[0])],
+        "close": head["close"].to_numpy(),
+        "volume": [carry["volume"].iat[0] + head["volume"].iat[0]],
+    }, index=head.index)
+
+
+class BarAggregator:
+    """Fold M1 chunks into one timeframe, emitting only completed bars."""
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.carry = None
+
+    def push(self, m1):
+        bars = m1.groupby(m1.index.floor(self.rule)).agg(OHLCV_AGG)
+        bars.index.name = "datetime"
+        if bars.empty:
+            return bars
+        if self.carry is not None:
+            if bars.index[0] == self.carry.index[0]:
+                bars = pd.concat([_merge_bar(self.carry, bars.iloc[:1]), bars.iloc[1:]])
+            else:
+                bars = pd.concat([self.carry, bars])
+        self.carry = bars.iloc[-1:]
+        return bars.iloc[:-1]
+
+    def flush(self):
+        bars, self.carry = self.carry, None
+        return bars
+
+
+class YearlyCsvWriter:
+    """Append bars to <out_dir>/<SYMBOL>_<TF>_<year>.csv, one file per calendar year."""
+
+    def __init__(self, out_dir, symbol, tf):
+        self.out_dir, self.symbol, self.tf = out_dir, symbol, tf
+        self.rows = {}
+
+    def path(self, year):
+        return os.path.join(self.out_dir, f"{self.symbol}_{self.tf}_{year}.csv")
+
+    def write(self, bars):
+        if bars is None or bars.empty:
+            return
+        for year, part in bars.groupby(bars.index.year):
+            fresh = year not in self.rows
+            part.to_csv(self.path(year), mode="w" if fresh else "a", header=fresh,
+                        date_format=DATE_FORMAT)
+            self.rows[year] = self.rows.get(year, 0) + len(part)
+
+
+def ingest_symbol(symbol, filepaths, out_dir, timeframes=None, chunk_rows=CHUNK_ROWS):
+    """Stream every M1 file of one symbol (oldest first) into all timeframes."""
+    timeframes = timeframes or TIMEFRAMES
+    aggs = {tf: BarAggregator(rule) for tf, rule in timeframes.items()}
+    writers = {tf: YearlyCsvWriter(out_dir, symbol, tf) for tf in timeframes}
+
+    for filepath in filepaths:
+        print(f"Processing {symbol} from {filepath} ...")
+        for m1 in read_histdata_chunks(filepath, chunk_rows):
+            for tf in timeframes:
+                writers[tf].write(aggs[tf].push(m1))
+    for tf in timeframes:
+        writers[tf].write(aggs[tf].flush())
+
+    return {tf: dict(w.rows) for tf, w in writers.items()}
+
+
+def ingest_all(data_dir, out_dir=None, timeframes=None, chunk_rows=CHUNK_ROWS, fill="drop"):
+    out_dir = out_dir or data_dir
+    summary = {}
+    for symbol, filepaths in find_m1_files(data_dir).items():
+        summary[symbol] = ingest_symbol(symbol, filepaths, out_dir, timeframes, chunk_rows)
+        for tf, rows in summary[symbol].items():
+            for year, n in rows.items():
+                print("Saved:", os.path.join(out_dir, f"{symbol}_{tf}_{year}.csv"), "Rows:", n)
+    build_merged_stores(summary, out_dir, fill)
+    print("Partitions updated:", build_partitions(out_dir, root=os.path.join(out_dir, "parts")))
+    return summary
+
+
+def build_merged_stores(summary, data_dir, fill="drop"):
+    """One aligned store per (TF, year) over every symbol that has that year."""
+    years = {}
+    for symbol, per_tf in summary.items():
+        for tf, rows in per_tf.items():
+            for year in rows:
+                years.setdefault((tf, year), []).append(symbol)
+    for (tf, year), symbols in sorted(years.items()):
+        if len(symbols) < 2:
+            continue
+        symbols = tuple(sorted(symbols))
+        build_merged(tf, year, symbols, fill, data_dir)
+        report = merged_report(tf, year, symbols, fill, data_dir)
+        missing = ", ".join(f"{s} {r['missing']}" for s, r in report["symbols"].items())
+        print(f"Merged {tf} {year}: {report['aligned_rows']}/{report['union_rows']} aligned bars "
+              f"(missing: {missing})")
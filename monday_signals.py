@@ -1,34 +1,11 @@
-import pandas as pd
 import matplotlib.pyplot as plt
+from report import show
+from indicators import signal_view
 
-# --- โหลดไฟล์ H1 & M15 ---
-eur_h1 = pd.read_csv("data/EURUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
-gbp_h1 = pd.read_csv("data/GBPUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
-eur_m15 = pd.read_csv("data/EURUSD_M15_2024.csv", parse_dates=["datetime"], index_col="datetime")
-gbp_m15 = pd.read_csv("data/GBPUSD_M15_2024.csv", parse_dates=["datetime"], index_col="datetime")
-
-# --- ตั้งค่าช่วง warm-up (1 อาทิตย์ก่อนหน้า) ---
-warmup_start, target_day = "2024-01-29", "2024-02-05"
-eur_h1, gbp_h1 = eur_h1.loc[warmup_start:target_day], gbp_h1.loc[warmup_start:target_day]
-eur_m15, gbp_m15 = eur_m15.loc[warmup_start:target_day], gbp_m15.loc[warmup_start:target_day]
-
-# --- รวมข้อมูล ---
-df_h1  = pd.DataFrame({"EURUSD": eur_h1["close"], "GBPUSD": gbp_h1["close"]}).dropna()
-df_m15 = pd.DataFrame({"EURUSD": eur_m15["close"], "GBPUSD": gbp_m15["close"]}).dropna()
-
-# --- สร้าง indicator ---
-def make_indicators(df, window):
-    df["corr"] = df["EURUSD"].rolling(window).corr(df["GBPUSD"])
-    df["spread"] = df["EURUSD"] - df["GBPUSD"]
-    df["zscore"] = (df["spread"] - df["spread"].rolling(window).mean()) / df["spread"].rolling(window).std()
-    return df
-
-df_h1  = make_indicators(df_h1,  window=50)
-df_m15 = make_indicators(df_m15, window=20)
-
-# --- ตัดมาเฉพาะวันจันทร์ ---
-df_h1_day  = df_h1.loc["2024-02-05"]
-df_m15_day = df_m15.loc["2024-02-05"]
+# --- โหลดเฉพาะวันจันทร์ + warm-up เท่า window (day index ใน datastore) ---
+target_day = "2024-02-05"
+df_h1_day  = signal_view("H1",  target_day, target_day, window=50)
+df_m15_day = signal_view("M15", target_day, target_day, window=20)
 
 # --- ฟังก์ชัน plot signals ---
 def plot_with_signals(ax, df, title):
@@ -69,4 +46,4 @@ axes[1,0].legend(); axes[1,0].set_title("M15 Prices (Feb 5)")
 plot_with_signals(axes[1,1], df_m15_day, "M15 Z-score with Signals (Feb 5)")
 
 plt.tight_layout()
-plt.show()
+show()
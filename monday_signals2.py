@@ -1,36 +1,13 @@
-import pandas as pd
 import matplotlib.pyplot as plt
+from report import show
+from indicators import signal_view
 
-# --- Load Data ---
-eur_h1 = pd.read_csv("data/EURUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
-gbp_h1 = pd.read_csv("data/GBPUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
-eur_m15 = pd.read_csv("data/EURUSD_M15_2024.csv", parse_dates=["datetime"], index_col="datetime")
-gbp_m15 = pd.read_csv("data/GBPUSD_M15_2024.csv", parse_dates=["datetime"], index_col="datetime")
-
-# --- Warmup + Target Day ---
-warmup_start, target_day = "2024-01-29", "2024-02-05"
-eur_h1, gbp_h1 = eur_h1.loc[warmup_start:target_day], gbp_h1.loc[warmup_start:target_day]
-eur_m15, gbp_m15 = eur_m15.loc[warmup_start:target_day], gbp_m15.loc[warmup_start:target_day]
-
-# --- Combine ---
-df_h1  = pd.DataFrame({"EURUSD": eur_h1["close"], "GBPUSD": gbp_h1["close"]}).dropna()
-df_m15 = pd.DataFrame({"EURUSD": eur_m15["close"], "GBPUSD": gbp_m15["close"]}).dropna()
-
-# --- Indicators ---
-def make_indicators(df, window):
-    df["corr"] = df["EURUSD"].rolling(window).corr(df["GBPUSD"])
-    df["spread"] = df["EURUSD"] - df["GBPUSD"]
-    df["zscore"] = (df["spread"] - df["spread"].rolling(window).mean()) / df["spread"].rolling(window).std()
-    return df
-
-df_h1  = make_indicators(df_h1,  window=50)
-df_m15 = make_indicators(df_m15, window=20)
-
-# --- Filter target day & session (14–17 น. ไทย = 07–10 UTC) ---
+# --- Target day & session (14–17 น. ไทย = 07–10 UTC) + warm-up เท่า window ---
+target_day = "2024-02-05"
 start_time = f"{target_day} 07:00"  # UTC
 end_time   = f"{target_day} 10:00"  # UTC
-df_h1_day  = df_h1.loc[start_time:end_time]
-df_m15_day = df_m15.loc[start_time:end_time]
+df_h1_day  = signal_view("H1",  start_time, end_time, window=50)
+df_m15_day = signal_view("M15", start_time, end_time, window=20)
 
 # --- Plot helper ---
 def plot_with_signals(ax, df, title):
@@ -79,4 +56,4 @@ axes[1,1].set_title("M15 Correlation (14–17 Thai)")
 plot_with_signals(axes[1,2], df_m15_day, "M15 Z-score with Signals")
 
 plt.tight_layout()
-plt.show()
+show()
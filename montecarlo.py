@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+# === Monte Carlo resampling of trade logs ===
+# สุ่มลำดับไม้ (bootstrap = สุ่มแบบใส่คืน, shuffle = สลับลำดับ) ทีละหลายหมื่น path เป็น array 2 มิติ
+# sizing แบบเดียวกับ equity_1percent.py : lot = equity * risk / (SL * $10)
+#   -> PnL(USD) = equity * risk * PnL(pips) / SL  (ทบต้นด้วย cumprod)
+# floating DD ของแต่ละไม้ = equity ก่อนเข้าไม้ * risk * tradeDD / SL
+
+
+def resample_index(n_trades, n_paths, method="bootstrap", length=None, rng=None):
+    rng = rng if rng is not None else np.random.default_rng()
+    if method == "bootstrap":
+        return rng.integers(0, n_trades, size=(n_paths, length or n_trades))
+    if method == "shuffle":
+        return rng.permuted(np.broadcast_to(np.arange(n_trades), (n_paths, n_trades)), axis=1)
+    raise ValueError(f"Unknown method: {method}")
+
+
+def compound(pnl, trade_dd, k, start=1.0):
+    """Compounded equity and floating trough over the last axis of pnl / trade_dd (pips).
+
+    k = risk / SL (broadcast against the leading axes). Returns (equity, trough)
+    with one extra column at the front = start.
+    """
+    shape = np.broadcast_shapes(np.shape(pnl), np.shape(k))
+    ratio = np.ones((*shape[:-1], shape[-1] + 1))
+    np.cumprod(1 + k * pnl, axis=-1, out=ratio[..., 1:])
+    trough = ratio.copy()
+    np.minimum(ratio[..., :-1] * (1 + k * trade_dd), ratio[..., 1:], out=trough[..., 1:])
+    return start * ratio, start * trough
+
+
+def drawdowns(equity, trough):
+    """(dd_pct, dd_abs) per trade: trough of trade t against the closed-equity peak up to trade t-1."""
+    peak = np.maximum.accumulate(equity, axis=-1)
+    dd_pct = np.zeros_like(equity)
+    dd_pct[..., 1:] = trough[..., 1:] / peak[..., :-1] - 1
+    dd_abs = np.zeros_like(equity)
+    dd_abs[..., 1:] = trough[..., 1:] - peak[..., :-1]
+    return dd_pct, dd_abs
+
+
+def simulate_paths(pnl, trade_dd, idx, initial_equity=1000, risk_percent=0.01, SL=30):
+    """Equity paths for a (paths x trades) index matrix.
+
+    Returns (equity, trough): equity after each trade, and the lowest floating
+    equity during each trade; both shaped (paths, trades + 1) with column 0 = start.
+    """
+    pnl = np.asarray(pnl, dtype=np.float64)
+    trade_dd = np.minimum(np.asarray(trade_dd, dtype=np.float64), 0)
+    return compound(pnl[idx], trade_dd[idx], risk_percent / SL, initial_equity)
+
+
+def monte_carlo(trades, n_paths=100_000, method="bootstrap", initial_equity=1000, risk_percent=0.01,
+                SL=30, ruin_level=0.5, length=None, batch=20_000, seed=None):
+    """Distributions of final equity, max drawdown (incl. floating) and risk of ruin.
+
+    trades: DataFrame with PnL and tradeDD (pips), e.g. trade_log_partial_noSL.csv.
+    ruin = equity incl. floating DD touches ruin_level * initial_equity.
+    """
+    rng = np.random.default_rng(seed)
+    pnl = trades["PnL"].to_numpy(np.float64)
+    trade_dd = trades["tradeDD"].to_numpy(np.float64) if "tradeDD" in trades else np.zeros_like(pnl)
+
+    final, max_dd, ruined = [], [], []
+    for start in range(0, n_paths, batch):
+        idx = resample_index(len(pnl), min(batch, n_paths - start), method, length, rng)
+        equity, trough = simulate_paths(pnl, trade_dd, idx, initial_equity, risk_percent, SL)
+        dd, _ = drawdowns(equity, trough)
+        final.append(equity[:, -1])
+        max_dd.append(dd.min(axis=1))
+        ruined.append(trough.min(axis=1) <= ruin_level * initial_equity)
+
+    return {
+        "final_equity": np.concatenate(final),
+        "max_dd": np.concatenate(max_dd),
+        "ruined": np.concatenate(ruined),
+    }
+
+
+def summarize(mc, percentiles=(1, 5, 25, 50, 75, 95, 99)):
+    table = pd.DataFrame({
+        "final_equity": np.percentile(mc["final_equity"], percentiles),
+        "max_dd_pct": np.percentile(mc["max_dd"] * 100, percentiles),
+    }, index=[f"p{p}" for p in percentiles])
+    return table, float(mc["ruined"].mean())
+
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+    from report import show
+
+    trades = pd.read_csv("trade_log_partial_noSL.csv")
+    mc = monte_carlo(trades, n_paths=100_000, method="bootstrap", risk_percent=0.01, SL=30, seed=0)
+    table, ruin = summarize(mc)
+    print(table)
+    print(f"Risk of ruin (equity <= 50%): {ruin * 100:.3f}%")
+
+    fig, ax = plt.subplots(1, 2, figsize=(12, 4))
+    ax[0].hist(mc["final_equity"], bins=100, color="blue", alpha=0.7)
+    ax[0].set_title("Final Equity (USD)")
+    ax[1].hist(mc["max_dd"] * 100, bins=100, color="red", alpha=0.7)
+    ax[1].set_title("Max Drawdown incl. Floating (%)")
+    plt.tight_layout()
+    show()
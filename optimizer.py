@@ -0,0 +1,90 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from datastore import load_pair
+from sweep import (SharedArrays, evaluate_points, init_worker, make_grid, publish_indicators, report_top,
+                   worker_arrays)
+
+# === Successive halving ===
+# grid ใหญ่ -> รอบแรกรันทุก config บนข้อมูลช่วงสั้น (ต้นประวัติ) แล้วเก็บแค่ 1/eta ที่ดีที่สุด
+# รอบถัดไปข้อมูลยาวขึ้น eta เท่า จนรอบสุดท้ายเหลือไม่กี่ตัวที่ได้รันเต็มประวัติ
+# indicator publish ลง shared memory ครั้งเดียว (เหมือน sweep.py) ทุกรอบใช้ pool เดิม
+
+
+def _run_round(task):
+    points, stop = task
+    return evaluate_points(worker_arrays(), points, stop)
+
+
+def _score(rows, objective, min_trades):
+    stats = pd.DataFrame(rows)
+    return np.where(stats["Trades"] >= min_trades, stats[objective], -np.inf), stats
+
+
+def _rounds(n_configs, n_bars, eta, min_bars):
+    # จำนวนรอบจำกัดทั้งจากขนาด grid และ slice แรกต้องยาวอย่างน้อย min_bars
+    # นับด้วยจำนวนเต็ม (math.log(243, 3) = 4.999... ทำให้รอบหาย)
+    rounds = 0
+    while eta ** (rounds + 1) <= n_configs and min_bars * eta ** (rounds + 1) <= n_bars:
+        rounds += 1
+    return rounds
+
+
+def successive_halving(df, grid, eta=3, min_bars=500, objective="Total PnL", min_trades=5,
+                       workers=None, chunk=16, tf="", store=None):
+    """Prune grid on growing prefixes of history; only survivors see the full data.
+
+    min_trades applies to the full history and is scaled down for shorter slices.
+    Returns (full-history results of the last round sorted by objective, report dict).
+    """
+    n = len(df)
+    rounds = _rounds(len(grid), n, eta, min_bars)
+    # bars ของแต่ละรอบ: n / eta^(rounds - r), รอบสุดท้าย = ทั้งก้อน
+    bars = [n // eta ** (rounds - r) for r in range(rounds)] + [n]
+
+    keys = list(grid[0])
+    candidates, log, evaluations = list(grid), [], 0
+    with SharedArrays(publish_indicators(df, [p["window"] for p in grid], tf, store)) as shared:
+        with ProcessPoolExecutor(workers or os.cpu_count(), initializer=init_worker,
+                                 initargs=(shared.spec,)) as pool:
+            for r, stop in enumerate(bars):
+                tasks = [(candidates[i:i + chunk], stop) for i in range(0, len(candidates), chunk)]
+                rows = [row for part in pool.map(_run_round, tasks) for row in part]
+                evaluations += len(candidates) * stop
+                score, stats = _score(rows, objective, math.ceil(min_trades * stop / n))
+                keep = len(candidates) if r == rounds else max(1, math.ceil(len(candidates) / eta))
+                order = np.argsort(-score, kind="stable")[:keep]
+                log.append({"round": r, "bars": stop, "candidates": len(candidates), "kept": keep,
+                            "best": float(score[order[0]])})
+                # config รอบถัดไปเอาจาก row ที่ได้คะแนน (ตัด column สถิติออก เหลือแค่ key ของ grid)
+                candidates = [{k: rows[i][k] for k in keys} for i in order]
+
+    full = len(grid) * n
+    report = {
+        "rounds": pd.DataFrame(log),
+        "bar_evaluations": evaluations,
+        "full_grid_evaluations": full,
+        "saved": full - evaluations,
+        "saved_pct": 100 * (1 - evaluations / full),
+    }
+    result = stats.iloc[order].reset_index(drop=True)
+    return result, report
+
+
+if __name__ == "__main__":
+    from report import ReportPool
+
+    df = load_pair("M15")
+    grid = make_grid(z_threshold=[1.5, 2.0, 2.5, 3.0], corr_threshold=[0.6, 0.7, 0.8, 0.9],
+                     window=[20, 50, 100, 200], tp1=[1.0, 0.5], tp2=[0.1], SL=[None, 20, 30, 50], cost=[1.2])
+    result, report = successive_halving(df, grid, eta=3, tf="M15")
+    with ReportPool() as reports:
+        report_top(reports, df, result, tf="M15")
+        print(report["rounds"].to_string(index=False))
+        print(f"Bar evaluations: {report['bar_evaluations']:,} vs full grid {report['full_grid_evaluations']:,} "
+              f"(saved {report['saved']:,} = {report['saved_pct']:.1f}%)")
+        print(result.head(10).to_string(index=False))
@@ -0,0 +1,373 @@
+import json
+import os
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from datastore import DATA_DIR, INDEX_COL, _source_stamp, load_arrays
+from engine import TRADE_COLUMNS, as_ns, simulate
+from indicators import KERNEL_BLOCK, StreamingPairKernel
+
+# === Partitioned multi-year dataset ===
+# data/parts/<SYMBOL>/<TF>/<year>/ : datetime.npy (int64 ns) + <field>.npy, manifest.json ที่ root บอกช่วงเวลาของทุก partition
+# query ช่วงวันที่ -> เปิด (memmap) เฉพาะ partition ที่ทับช่วงนั้น ไม่ต้องโหลดทั้ง 20 ปี
+# stream_backtest เดินทีละปี: indicator ต่อเนื่องข้ามปีด้วย StreamingPairKernel
+# ไม้ที่ยังเปิดอยู่ตอนจบ partition ถือข้ามไปปีถัดไป -> ได้ trade ชุดเดียวกับรันทั้งก้อน
+
+PARTITION_DIR = os.path.join(DATA_DIR, "parts")
+MANIFEST = "manifest.json"
+
+_CSV_RE = re.compile(r"([A-Z]{6})_([A-Z]+\d+)_(\d{4})\.csv$")
+
+
+def _partition_path(root, symbol, tf, year):
+    return os.path.join(root, symbol, tf, str(year))
+
+
+def _read_manifest(root):
+    try:
+        with open(os.path.join(root, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"partitions": []}
+
+
+def _write_manifest(root, manifest):
+    manifest["partitions"].sort(key=lambda p: (p["symbol"], p["tf"], p["year"]))
+    tmp = os.path.join(root, f"{MANIFEST}.tmp{os.getpid()}")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, os.path.join(root, MANIFEST))
+
+
+def _as_ns(t):
+    return None if t is None else int(pd.Timestamp(t).value)
+
+
+def write_partition(root, symbol, tf, year, arrays, source=None):
+    """Write one symbol/TF/year partition ({"datetime": int64 ns, field: array}); returns its manifest entry."""
+    path = _partition_path(root, symbol, tf, year)
+    tmp = f"{path}.tmp{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    times = np.asarray(arrays[INDEX_COL], dtype=np.int64)
+    fields = [c for c in arrays if c != INDEX_COL]
+    np.save(os.path.join(tmp, f"{INDEX_COL}.npy"), times)
+    for col in fields:
+        np.save(os.path.join(tmp, f"{col}.npy"), np.asarray(arrays[col]))
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+
+    entry = {"symbol": symbol, "tf": tf, "year": int(year), "rows": int(len(times)), "fields": fields,
+             "start_ns": int(times[0]) if len(times) else None, "end_ns": int(times[-1]) if len(times) else None,
+             "path": os.path.relpath(path, root)}
+    if source is not None:
+        entry["source"] = source
+    return entry
+
+
+def build_partitions(data_dir=None, root=None, symbols=None, timeframes=None):
+    """Partition every <data_dir>/<SYMBOL>_<TF>_<year>.csv (only the ones that changed) and update the manifest.
+
+    The manifest mirrors data_dir: entries whose CSV is gone or came from another
+    directory are removed together with their files.
+    """
+    data_dir, root = os.path.abspath(data_dir or DATA_DIR), root or PARTITION_DIR
+    os.makedirs(root, exist_ok=True)
+    manifest = _read_manifest(root)
+    old = {(p["symbol"], p["tf"], p["year"]): p for p in manifest["partitions"]}
+    entries, written = {}, 0
+    for name in sorted(os.listdir(data_dir)):
+        m = _CSV_RE.match(name)
+        if m is None:
+            continue
+        symbol, tf, year = m.group(1), m.group(2), int(m.group(3))
+        key = (symbol, tf, year)
+        csv_path = os.path.join(data_dir, name)
+        prev = old.get(key)
+        same_source = prev is not None and prev.get("source_path") == csv_path
+        if (symbols and symbol not in symbols) or (timeframes and tf not in timeframes):
+            if same_source:
+                entries[key] = prev   # นอก filter รอบนี้ แต่ยังมาจาก data_dir เดิม -> เก็บไว้
+            continue
+        stamp = _source_stamp(csv_path)
+        if same_source and prev.get("source") == stamp and os.path.isdir(os.path.join(root, prev["path"])):
+            entries[key] = prev
+            continue
+        entries[key] = write_partition(root, symbol, tf, year, load_arrays(csv_path), stamp)
+        entries[key]["source_path"] = csv_path
+        written += 1
+    # partition ที่ CSV หายไปหรือมาจากโฟลเดอร์อื่น
+    for key, prev in old.items():
+        if key not in entries:
+            shutil.rmtree(os.path.join(root, prev["path"]), ignore_errors=True)
+    manifest["partitions"] = list(entries.values())
+    _write_manifest(root, manifest)
+    return written
+
+
+class Dataset:
+    """Date-range access to the partitioned store; only partitions touching the range are opened."""
+
+    def __init__(self, root=None):
+        self.root = root or PARTITION_DIR
+        self.manifest = _read_manifest(self.root)
+
+    def partitions(self, symbol, tf, start=None, end=None):
+        """Manifest entries of symbol/TF overlapping [start, end], oldest first."""
+        lo, hi = _as_ns(start), _as_ns(end)
+        out = [p for p in self.manifest["partitions"]
+               if p["symbol"] == symbol and p["tf"] == tf and p["rows"]
+               and (lo is None or p["end_ns"] >= lo) and (hi is None or p["start_ns"] <= hi)]
+        return sorted(out, key=lambda p: p["year"])
+
+    def years(self, tf, symbols, start=None, end=None):
+        """Years for which every symbol has a partition in range."""
+        common = None
+        for symbol in symbols:
+            ys = {p["year"] for p in self.partitions(symbol, tf, start, end)}
+            common = ys if common is None else common & ys
+        return sorted(common or ())
+
+    def _open(self, entry, fields, lo=None, hi=None):
+        path = os.path.join(self.root, entry["path"])
+        times = np.load(os.path.join(path, f"{INDEX_COL}.npy"), mmap_mode="r")
+        a = 0 if lo is None else int(np.searchsorted(times, lo, side="left"))
+        b = len(times) if hi is None else int(np.searchsorted(times, hi, side="right"))
+        cols = {INDEX_COL: times[a:b]}
+        for f in fields or entry["fields"]:
+            cols[f] = np.load(os.path.join(path, f"{f}.npy"), mmap_mode="r")[a:b]
+        return cols
+
+    def load_arrays(self, symbol, tf, start=None, end=None, fields=("close",)):
+        """{"datetime": int64 ns, field: array} for start <= t <= end (memmap slices when one partition)."""
+        lo, hi = _as_ns(start), _as_ns(end)
+        parts = [self._open(p, fields, lo, hi) for p in self.partitions(symbol, tf, start, end)]
+        if len(parts) == 1:
+            return parts[0]
+        keys = [INDEX_COL, *(fields or [])] if not parts else list(parts[0])
+        return {k: np.concatenate([p[k] for p in parts]) if parts else np.empty(0) for k in keys}
+
+    def load(self, symbol, tf, start=None, end=None, fields=("close",)):
+        cols = self.load_arrays(symbol, tf, start, end, fields)
+        index = pd.DatetimeIndex(np.asarray(cols.pop(INDEX_COL), dtype=np.int64).view("datetime64[ns]"),
+                                 name=INDEX_COL)
+        return pd.DataFrame({k: np.asarray(v) for k, v in cols.items()}, index=index, copy=False)
+
+    def iter_pair(self, tf, symbols=("EURUSD", "GBPUSD"), start=None, end=None, field="close"):
+        """One frame per year: field of every symbol on their common timestamps (same as load_pair)."""
+        for year in self.years(tf, symbols, start, end):
+            cols = {}
+            for symbol in symbols:
+                entry = next(p for p in self.partitions(symbol, tf, start, end) if p["year"] == year)
+                cols[symbol] = self._open(entry, [field], _as_ns(start), _as_ns(end))
+            times = cols[symbols[0]][INDEX_COL]
+            for symbol in symbols[1:]:
+                times = np.intersect1d(times, cols[symbol][INDEX_COL], assume_unique=True)
+            data = {}
+            for symbol in symbols:
+                own = cols[symbol][INDEX_COL]
+                data[symbol] = np.asarray(cols[symbol][field])[np.searchsorted(own, times)]
+            index = pd.DatetimeIndex(np.asarray(times, dtype=np.int64).view("datetime64[ns]"), name=INDEX_COL)
+            frame = pd.DataFrame(data, index=index)
+            yield year, frame.dropna()
+
+    def load_pair(self, tf, symbols=("EURUSD", "GBPUSD"), start=None, end=None, field="close"):
+        frames = [f for _, f in self.iter_pair(tf, symbols, start, end, field)]
+        if not frames:
+            return pd.DataFrame(columns=list(symbols), index=pd.DatetimeIndex([], name=INDEX_COL))
+        return pd.concat(frames)
+
+
+def _trade_log(entry_ns, exit_ns, pnl, trade_dd, result):
+    entry = pd.DatetimeIndex(np.asarray(entry_ns, dtype=np.int64).view("datetime64[ns]"))
+    exit_ = pd.DatetimeIndex(np.asarray(exit_ns, dtype=np.int64).view("datetime64[ns]"))
+    pnl = np.asarray(pnl, dtype=np.float64)
+    log = pd.DataFrame({
+        "entry": entry,
+        "exit": exit_,
+        "PnL": pnl,
+        "holding_h": (exit_ - entry).total_seconds().to_numpy() / 3600,
+        "equity": np.cumsum(pnl),
+        "tradeDD": np.asarray(trade_dd, dtype=np.float64),
+    }, columns=TRADE_COLUMNS)
+    log["result"] = np.asarray(result, dtype=np.int8)
+    return log
+
+
+def stream_backtest(dataset, tf, window, start=None, end=None, symbols=("EURUSD", "GBPUSD"),
+                    block=KERNEL_BLOCK, **params):
+    """engine.simulate over a multi-year range, one partition (year) in memory at a time.
+
+    Same trades as make_indicators + backtest_partial on the concatenated history:
+    the kernel state and any open trade carry over partition boundaries.
+    Returns the usual trade log (engine.TRADE_COLUMNS) plus "result".
+    """
+    z_threshold = params.get("z_threshold", 2.0)
+    corr_threshold = params.get("corr_threshold", 0.8)
+    kernel = StreamingPairKernel(window, block)
+    # แท่งที่ยังต้องใช้ simulate: ตั้งแต่แท่งหลัง exit ล่าสุด / สัญญาณแรกที่ยังไม่ได้ใช้
+    pending = {"time": np.empty(0, np.int64), "spread": np.empty(0), "zscore": np.empty(0), "corr": np.empty(0)}
+    times = np.empty(0, np.int64)    # เวลาของแท่งที่เข้า kernel แล้วแต่ยังไม่ออกมา
+    trades = []
+
+    def run(out, new_times):
+        nonlocal pending
+        if len(out["zscore"]) == 0:
+            return
+        pending = {"time": np.concatenate([pending["time"], new_times]),
+                   **{k: np.concatenate([pending[k], out[k]]) for k in ("spread", "zscore", "corr")}}
+        res = simulate(pending["spread"], pending["zscore"], pending["corr"], **params)
+        t = pending["time"]
+        for k in range(len(res["PnL"])):
+            trades.append((t[res["entry_idx"][k]], t[res["exit_idx"][k]], res["PnL"][k],
+                           res["tradeDD"][k], res["result"][k]))
+        cut = int(res["exit_idx"][-1]) + 1 if len(res["PnL"]) else 0
+        # ไม้ถัดไปเข้าได้เร็วสุดที่สัญญาณแรกหลัง cut -> ไม่ต้องเก็บแท่งก่อนหน้านั้น
+        with np.errstate(invalid="ignore"):
+            sig = np.flatnonzero((np.abs(pending["zscore"][cut:]) > z_threshold)
+                                 & (pending["corr"][cut:] > corr_threshold))
+        cut += int(sig[0]) if len(sig) else len(t) - cut
+        pending = {k: v[cut:] for k, v in pending.items()}
+
+    for _, frame in dataset.iter_pair(tf, symbols, start, end):
+        times = np.concatenate([times, as_ns(frame.index)])
+        out = kernel.push(frame[symbols[0]].to_numpy(np.float64), frame[symbols[1]].to_numpy(np.float64))
+        k = len(out["zscore"])
+        run(out, times[:k])
+        times = times[k:]
+    run(kernel.flush(), times)
+
+    cols = list(zip(*trades)) if trades else [[], [], [], [], []]
+    return _trade_log(*cols)
+
+# === Parallel chunks + stitch ===
+# แบ่งประวัติเป็นช่วง (ค่าเริ่มต้น: ปีละช่วง) แต่ละช่วง simulate ใน process ของตัวเองโดยเริ่มจากไม่มีไม้
+# indicator ของช่วง: โหลดเกินหน้า window-1 แท่ง + เศษถึงต้น block ของ kernel และเกินท้ายถึงท้าย block
+# -> prefix sums ตัดที่ตำแหน่งเดียวกับรันทั้งก้อน ได้ค่าเท่ากันทุก bit
+# stitch (ใน process หลัก เรียงตามช่วง): ไม้ที่ค้างข้ามรอยต่อ simulate ต่อจากแท่งที่เข้า
+# จนถึง exit ที่ผลของช่วงถัดไปก็ไม่มีไม้ถืออยู่ (state ตรงกันแล้ว) จากนั้นใช้ trade ของช่วงนั้นต่อได้เลย
+
+
+def _signal_idx(zscore, corr, params):
+    with np.errstate(invalid="ignore"):
+        return np.flatnonzero((np.abs(zscore) > params.get("z_threshold", 2.0))
+                              & (corr > params.get("corr_threshold", 0.8)))
+
+
+def _handoff(res, zscore, corr, params):
+    # simulate ทิ้งไม้ที่ยังไม่ปิด -> ไม้นั้นเข้าที่สัญญาณแรกหลัง exit สุดท้าย
+    after = int(res["exit_idx"][-1]) + 1 if len(res["PnL"]) else 0
+    sig = _signal_idx(zscore[after:], corr[after:], params)
+    return after + int(sig[0]) if len(sig) else None
+
+
+def _shift(res, offset):
+    return dict(res, entry_idx=res["entry_idx"] + offset, exit_idx=res["exit_idx"] + offset)
+
+
+def chunk_bounds(times, chunk_bars=None):
+    """[(first, stop)] bar ranges: one per calendar year, or every chunk_bars bars."""
+    n = len(times)
+    if chunk_bars:
+        cuts = list(range(chunk_bars, n, chunk_bars))
+    else:
+        years = pd.DatetimeIndex(np.asarray(times, dtype=np.int64).view("datetime64[ns]")).year.to_numpy()
+        cuts = (np.flatnonzero(years[1:] != years[:-1]) + 1).tolist()
+    edges = [0, *cuts, n]
+    return [(a, b) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+
+def _chunk_task(task):
+    root, tf, symbols, window, block, params, first, stop, lo, end, t_lo, t_end = task
+    frame = Dataset(root).load_pair(tf, symbols, t_lo, t_end)
+    if len(frame) != end - lo:
+        raise RuntimeError(f"{tf} {symbols}: partitions changed while running ({len(frame)} != {end - lo} bars)")
+    kernel = StreamingPairKernel(window, block, start=lo)
+    parts = [kernel.push(frame[symbols[0]].to_numpy(np.float64), frame[symbols[1]].to_numpy(np.float64)),
+             kernel.flush()]
+    begin = kernel.emitted - sum(len(p["zscore"]) for p in parts)
+    ind = {k: np.concatenate([p[k] for p in parts])[first - begin:stop - begin] for k in ("spread", "zscore", "corr")}
+    res = simulate(ind["spread"], ind["zscore"], ind["corr"], **params)
+    handoff = _handoff(res, ind["zscore"], ind["corr"], params)
+    return dict(ind, first=first, stop=stop, res=_shift(res, first),
+                handoff=None if handoff is None else first + handoff)
+
+
+def _synced(chunk, j):
+    # ผลของช่วงนี้ไม่มีไม้ถืออยู่หลังแท่ง j -> ต่อจาก j ได้ trade เดียวกับรันต่อเนื่อง
+    res, handoff = chunk["res"], chunk["handoff"]
+    holding = (res["entry_idx"] <= j) & (res["exit_idx"] > j)
+    return not holding.any() and (handoff is None or handoff > j)
+
+
+def stitch_chunks(chunks, params):
+    """Merge per-chunk simulate() results (in order) into the sequential run's trades."""
+    keys = ("entry_idx", "exit_idx", "PnL", "tradeDD", "result")
+    out = {k: [] for k in keys}
+    take = lambda res, mask=slice(None): [out[k].append(res[k][mask]) for k in keys]
+    r = 0   # รันต่อเนื่องไม่มีไม้ตั้งแต่แท่ง r (r < first ของช่วง = มีไม้ค้างเข้าที่แท่ง r)
+    for c, chunk in enumerate(chunks):
+        res = chunk["res"]
+        if r == chunk["first"]:
+            take(res)
+            r = chunk["stop"] if chunk["handoff"] is None else chunk["handoff"]
+            continue
+        # simulate ใหม่จากแท่งที่ไม้ค้างเข้า จนถึงท้ายช่วงนี้
+        src = [ch for ch in chunks[:c + 1] if ch["stop"] > r]
+        ind = {k: np.concatenate([ch[k][max(r - ch["first"], 0):] for ch in src]) for k in ("spread", "zscore", "corr")}
+        sub = simulate(ind["spread"], ind["zscore"], ind["corr"], **params)
+        shifted = _shift(sub, r)
+        hit = next((k for k, j in enumerate(shifted["exit_idx"]) if _synced(chunk, j)), None)
+        if hit is not None:
+            j = shifted["exit_idx"][hit]
+            take(shifted, slice(0, hit + 1))
+            take(res, res["entry_idx"] > j)
+            r = chunk["stop"] if chunk["handoff"] is None else chunk["handoff"]
+        else:
+            take(shifted)
+            handoff = _handoff(sub, ind["zscore"], ind["corr"], params)
+            r = chunk["stop"] if handoff is None else r + handoff
+    return {k: np.concatenate(v) if v else np.empty(0) for k, v in out.items()}
+
+
+def parallel_backtest(dataset, tf, window, start=None, end=None, symbols=("EURUSD", "GBPUSD"),
+                      chunk_bars=None, workers=None, block=KERNEL_BLOCK, **params):
+    """stream_backtest split into chunks (per year by default) run on all cores, then stitched.
+
+    Same trade log as the sequential run; each worker reads its chunk plus the
+    warm-up / block padding the kernel needs from the partitions.
+    """
+    symbols = tuple(symbols)
+    frames = [as_ns(f.index) for _, f in dataset.iter_pair(tf, symbols, start, end)]
+    times = np.concatenate(frames) if frames else np.empty(0, np.int64)
+    n = len(times)
+    tasks = []
+    for first, stop in chunk_bounds(times, chunk_bars):
+        # kernel block แรกที่ครอบ first และ block สุดท้ายที่ครอบ stop - 1 (ตาราง block เดียวกับรันทั้งก้อน)
+        lo = max(first - window + 1, 0) // block * block
+        end_ = min(window - 1 + (max(stop - window, 0) // block + 1) * block, n)
+        tasks.append((dataset.root, tf, symbols, window, block, params, first, stop, lo, end_,
+                      int(times[lo]), int(times[end_ - 1])))
+    with ProcessPoolExecutor(workers or os.cpu_count()) as pool:
+        chunks = list(pool.map(_chunk_task, tasks))
+
+    res = stitch_chunks(chunks, params)
+    return _trade_log(times[res["entry_idx"].astype(np.int64)], times[res["exit_idx"].astype(np.int64)],
+                      res["PnL"], res["tradeDD"], res["result"])
+
+
+if __name__ == "__main__":
+    print("Partitions written:", build_partitions())
+    ds = Dataset()
+    for p in ds.manifest["partitions"]:
+        print(f"{p['symbol']} {p['tf']} {p['year']}: {p['rows']} rows")
+    params = dict(z_threshold=2.0, corr_threshold=0.8, tp1=1.0, tp2=0.1, cost=1.2)
+    trades = stream_backtest(ds, "M15", 20, **params)
+    print(f"Trades: {len(trades)}  Total PnL: {trades['PnL'].sum():.2f}")
+    # ข้อมูลมีปีเดียว -> แบ่งเป็นช่วงละ ~1 เดือนเพื่อให้ใช้หลาย core
+    merged = parallel_backtest(ds, "M15", 20, chunk_bars=2000, **params)
+    print(f"Parallel: {len(merged)} trades, same as sequential: {merged.equals(trades)}")
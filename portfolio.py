@@ -0,0 +1,194 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from scanner import pair_stats
+
+# === Portfolio backtest: หลาย spread พร้อมกันบนทุนก้อนเดียว ===
+# position book เป็น array ขนาดเท่าจำนวนคู่ (1 slot ต่อคู่) ไม่ใช่ dict -> ทุกแท่งคำนวณ exit / floating
+# ของทุกคู่ด้วย numpy ครั้งเดียว งานต่อแท่งเป็น O(pairs) -> รวม O(bars x pairs)
+# z-score / corr ของทุกคู่มาจาก scanner.pair_stats (kernel เดียวกับ indicators)
+# spread A/B: z > 0 -> short A long B, z < 0 -> long A short B (แบบเดียวกับ ิbacktestsprede.py)
+# เงินเป็น USD: conv = USD ต่อ 1 หน่วย quote currency ของแต่ละ symbol ในแต่ละแท่ง
+
+CONTRACT = 100_000
+
+
+def pip_size(symbol):
+    return 0.01 if symbol.endswith("JPY") else 0.0001
+
+
+def quote_to_usd(closes):
+    """(bars x symbols) USD value of one unit of each symbol's quote currency."""
+    conv = pd.DataFrame(index=closes.index, columns=closes.columns, dtype=np.float64)
+    for sym in closes.columns:
+        quote = sym[3:]
+        if quote == "USD":
+            conv[sym] = 1.0
+        elif sym[:3] == "USD":
+            conv[sym] = 1.0 / closes[sym]
+        elif f"{quote}USD" in closes:
+            conv[sym] = closes[f"{quote}USD"]
+        elif f"USD{quote}" in closes:
+            conv[sym] = 1.0 / closes[f"USD{quote}"]
+        else:
+            raise ValueError(f"{sym}: need {quote}USD or USD{quote} in closes to value PnL in USD")
+    return conv
+
+
+def _currency_legs(pairs):
+    # ต่อคู่: exposure ต่อ 1 USD notional เมื่อ long spread (long A / short B)
+    # long A = +base(A) -quote(A), short B = -base(B) +quote(B) -> net ต่อ currency = side * (na @ EA + nb @ EB)
+    currencies = sorted({s[i:i + 3] for p in pairs for s in p for i in (0, 3)})
+    col = {c: k for k, c in enumerate(currencies)}
+    EA = np.zeros((len(pairs), len(currencies)))
+    EB = np.zeros((len(pairs), len(currencies)))
+    for k, (a, b) in enumerate(pairs):
+        EA[k, col[a[:3]]] += 1
+        EA[k, col[a[3:]]] -= 1
+        EB[k, col[b[:3]]] -= 1
+        EB[k, col[b[3:]]] += 1
+    return currencies, EA, EB
+
+
+def simulate_portfolio(closes, pairs=None, window=50, z_threshold=2.0, corr_threshold=0.8, tp=0.1,
+                       z_sl=None, SL=None, cost=1.2, lots=0.1, balance=10_000.0, leverage=100,
+                       max_margin_pct=0.5, max_exposure=None):
+    """Run the spread entry / exit rules on every pair at once with shared capital.
+
+    closes: aligned close prices (one column per symbol); pairs: [("EURUSD", "GBPUSD"), ...].
+    SL / cost are in pips of the spread (both legs); lots per leg.
+    max_exposure: USD notional cap per currency (scalar or {ccy: cap}); entries that would
+    breach it, or push used margin above max_margin_pct of equity, are skipped. The cap is
+    checked on entry: closing an offsetting position can leave net exposure above it.
+    Returns (trades DataFrame, per-bar account DataFrame, max |exposure| per currency).
+    """
+    pairs = pairs or list(itertools.combinations(closes.columns, 2))
+    corr_df, z_df = pair_stats(closes, window, pairs)
+    Z, CORR = z_df.to_numpy(), corr_df.to_numpy()
+    X = closes.to_numpy(np.float64)
+    CONV = quote_to_usd(closes).to_numpy()
+    sym = {s: k for k, s in enumerate(closes.columns)}
+    ia = np.array([sym[a] for a, _ in pairs])
+    ib = np.array([sym[b] for _, b in pairs])
+    pip = np.array([pip_size(a) for a, _ in pairs])
+    currencies, EA, EB = _currency_legs(pairs)
+    if max_exposure is None:
+        cap = np.full(len(currencies), np.inf)
+    elif isinstance(max_exposure, dict):
+        cap = np.array([max_exposure.get(c, np.inf) for c in currencies], dtype=np.float64)
+    else:
+        cap = np.full(len(currencies), float(max_exposure))
+
+    n, P = Z.shape
+    units = lots * CONTRACT
+    with np.errstate(invalid="ignore"):
+        signal = (np.abs(Z) > z_threshold) & (CORR > corr_threshold)
+    # bar ไหนไม่มีสัญญาณเลยและไม่มีไม้เปิด ข้ามได้
+    any_signal = signal.any(axis=1)
+
+    # --- position book (1 slot ต่อคู่) ---
+    is_open = np.zeros(P, dtype=bool)
+    side = np.zeros(P)            # +1 = long A / short B, -1 = short A / long B
+    entry_i = np.zeros(P, dtype=np.int64)
+    entry_a = np.zeros(P)
+    entry_b = np.zeros(P)
+    entry_z = np.zeros(P)
+    entry_cost = np.zeros(P)      # USD หักตอนเข้า
+
+    closed_pnl = 0.0
+    equity_out = np.empty(n)
+    floating_out = np.zeros(n)
+    margin_out = np.zeros(n)
+    open_out = np.zeros(n, dtype=np.int64)
+    max_expo = np.zeros(len(currencies))
+    trades = []
+
+    for t in range(n):
+        n_open = int(is_open.sum())
+        if n_open == 0 and not any_signal[t]:
+            equity_out[t] = balance + closed_pnl
+            continue
+
+        x, conv = X[t], CONV[t]
+        pa, pb, ca, cb = x[ia], x[ib], conv[ia], conv[ib]
+        floating = np.zeros(P)
+        exiting = np.zeros(P, dtype=bool)
+        if n_open:
+            # PnL (USD) ของทั้งสองขา และ PnL เป็น pip ของ spread (ไว้เทียบ SL)
+            floating = side * units * ((pa - entry_a) * ca - (pb - entry_b) * cb)
+            floating[~is_open] = 0.0
+            spread_pips = side * ((pa - entry_a) - (pb - entry_b)) / pip - cost
+            z = Z[t]
+            az = np.abs(z)
+            with np.errstate(invalid="ignore"):
+                hit_tp = az <= tp
+                hit_zsl = az >= z_sl if z_sl is not None else np.zeros(P, dtype=bool)
+                hit_sl = spread_pips <= -SL if SL is not None else np.zeros(P, dtype=bool)
+            exiting = is_open & (hit_sl | hit_zsl | hit_tp)
+            for k in np.flatnonzero(exiting):
+                pnl = float(floating[k]) - entry_cost[k]
+                closed_pnl += pnl
+                reason = "SL" if hit_sl[k] else "ZSL" if hit_zsl[k] else "TP"
+                trades.append((pairs[k][0], pairs[k][1], entry_i[k], t, side[k], entry_z[k], z[k],
+                               pnl, float(spread_pips[k]), reason))
+            is_open &= ~exiting
+            floating[exiting] = 0.0
+
+        notional_a = units * pa * ca
+        notional_b = units * pb * cb
+        margin = float(((notional_a + notional_b) * is_open).sum()) / leverage
+        equity = balance + closed_pnl + float(floating.sum()) - float((entry_cost * is_open).sum())
+        held = side * is_open
+        expo = (held * notional_a) @ EA + (held * notional_b) @ EB
+
+        # แท่งที่เพิ่งปิดยังไม่เข้าใหม่ (เหมือน loop เดิม: bar เดียวกันทำได้แค่ exit หรือ entry)
+        candidates = np.flatnonzero(signal[t] & ~is_open & ~exiting)
+        # |z| มากสุดได้ก่อน เมื่อติด cap
+        for k in candidates[np.argsort(-np.abs(Z[t, candidates]), kind="stable")]:
+            s = -1.0 if Z[t, k] > 0 else 1.0
+            add = s * (notional_a[k] * EA[k] + notional_b[k] * EB[k])
+            new_margin = (notional_a[k] + notional_b[k]) / leverage
+            if np.any(np.abs(expo + add) > cap) or margin + new_margin > max_margin_pct * equity:
+                continue
+            expo += add
+            margin += new_margin
+            is_open[k], side[k], entry_i[k] = True, s, t
+            entry_a[k], entry_b[k], entry_z[k] = pa[k], pb[k], Z[t, k]
+            entry_cost[k] = cost * pip[k] * units * (ca[k] + cb[k]) / 2
+        np.maximum(max_expo, np.abs(expo), out=max_expo)
+
+        equity_out[t] = balance + closed_pnl + float(floating.sum()) - float((entry_cost * is_open).sum())
+        floating_out[t] = float(floating.sum())
+        margin_out[t] = margin
+        open_out[t] = int(is_open.sum())
+
+    index = closes.index
+    trades = pd.DataFrame(trades, columns=["leg_a", "leg_b", "entry", "exit", "side", "entry_z", "exit_z",
+                                           "PnL_usd", "PnL_pips", "result"])
+    trades["entry"] = index[trades["entry"].to_numpy(np.int64)]
+    trades["exit"] = index[trades["exit"].to_numpy(np.int64)]
+    trades["equity"] = balance + trades["PnL_usd"].cumsum()
+    account = pd.DataFrame({"equity": equity_out, "floating": floating_out, "margin": margin_out,
+                            "open_positions": open_out}, index=index)
+    return trades, account, pd.Series(max_expo, index=currencies, name="max_exposure_usd")
+
+
+if __name__ == "__main__":
+    from datastore import load_pair
+    from report import show
+    from scanner import find_symbols
+
+    tf = "H1"
+    closes = load_pair(tf, symbols=find_symbols(tf))
+    trades, account, exposure = simulate_portfolio(closes, window=50, SL=30, cost=1.2, lots=0.1,
+                                                   max_exposure=50_000)
+    print(f"Pairs: {closes.shape[1] * (closes.shape[1] - 1) // 2}  Trades: {len(trades)}  "
+          f"PnL: {trades['PnL_usd'].sum():.2f} USD")
+    print(f"Max open: {account['open_positions'].max()}  Max margin: {account['margin'].max():.2f}  "
+          f"Min equity: {account['equity'].min():.2f}")
+    print(exposure.round(0).to_string())
+
+    account["equity"].plot(figsize=(12, 5), title="Portfolio Equity incl. Floating (USD)", grid=True)
+    show()
@@ -0,0 +1,174 @@
+import html
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+import numpy as np
+
+# === Headless report rendering ===
+# วาดกราฟด้วย Agg (ไม่ต้องมีจอ) แล้วเซฟเป็น PNG/SVG + index.html
+# ReportPool ส่งงานวาดให้ process pool แล้ว return ทันที -> backtest ไม่ต้องรอกราฟ
+# show() ใช้แทน plt.show() ในสคริปต์: มีจอ = เปิดหน้าต่างเหมือนเดิม, headless = เซฟไฟล์ลง reports/
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+REPORT_DIR = os.path.join(base_dir, "reports")
+
+
+def is_headless():
+    if os.environ.get("CORRBOT_HEADLESS") == "1":
+        return True
+    return os.name == "posix" and sys.platform != "darwin" and not os.environ.get("DISPLAY")
+
+
+if is_headless():
+    matplotlib.use("Agg")
+
+
+_saved_count = {}
+
+
+def show(name=None, out_dir=REPORT_DIR, fmt="png"):
+    """plt.show() on a desktop; on a headless box save every open figure and close it."""
+    import matplotlib.pyplot as plt
+
+    if not is_headless():
+        plt.show()
+        return []
+    name = name or os.path.splitext(os.path.basename(sys.argv[0] or "figure"))[0]
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for num in plt.get_fignums():
+        # สคริปต์ที่เรียก show() หลายครั้ง -> name.png, name_2.png, ...
+        _saved_count[name] = _saved_count.get(name, 0) + 1
+        suffix = f"_{_saved_count[name]}" if _saved_count[name] > 1 else ""
+        path = os.path.join(out_dir, f"{name}{suffix}.{fmt}")
+        plt.figure(num).savefig(path)
+        paths.append(path)
+    plt.close("all")
+    for path in paths:
+        print("Saved chart:", path)
+    return paths
+
+
+# --- chart renderers (Figure + Agg canvas, ไม่แตะ pyplot state -> ใช้ใน worker ได้) ---
+def _new_figure(figsize):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _draw_equity(ax, spec):
+    ax.plot(spec["x"], spec["y"], label="Equity", drawstyle="steps-post")
+    ax.set_ylabel(spec.get("ylabel", "Pips"))
+
+
+def _draw_drawdown(ax, spec):
+    ax.fill_between(spec["x"], spec["y"], 0, color="red", alpha=0.4, label="Drawdown")
+    ax.set_ylabel(spec.get("ylabel", "Pips"))
+
+
+def _draw_hist(ax, spec):
+    ax.hist(spec["values"], bins=spec.get("bins", 50), color="blue", alpha=0.7)
+
+
+def _draw_signals(ax, spec):
+    ax.plot(spec["x"], spec["zscore"], color="red", label="Z-score")
+    z = spec.get("z_threshold", 2.0)
+    ax.axhline(z, color="gray", linestyle="--")
+    ax.axhline(-z, color="gray", linestyle="--")
+    ax.axhline(0, color="black", linestyle=":")
+
+
+DRAWERS = {"equity": _draw_equity, "drawdown": _draw_drawdown, "hist": _draw_hist,
+           "signals": _draw_signals}
+
+
+def render_chart(spec):
+    """Render one chart spec {"kind", "path", "title", data...} to file; returns the path."""
+    fig = _new_figure(spec.get("figsize", (12, 4)))
+    ax = fig.add_subplot(1, 1, 1)
+    DRAWERS[spec["kind"]](ax, spec)
+    ax.set_title(spec.get("title", spec["kind"]))
+    ax.grid(True, alpha=0.3)
+    if ax.get_legend_handles_labels()[0]:
+        ax.legend()
+    fig.tight_layout()
+    fig.savefig(spec["path"])
+    return spec["path"]
+
+
+def trade_charts(trades):
+    """Equity / drawdown / PnL histogram specs from a trade log (exit, PnL, equity columns)."""
+    x = trades["exit"].to_numpy() if "exit" in trades else np.arange(len(trades))
+    equity = trades["equity"].to_numpy() if "equity" in trades else trades["PnL"].cumsum().to_numpy()
+    return [
+        {"kind": "equity", "x": x, "y": equity, "title": "Equity Curve"},
+        {"kind": "drawdown", "x": x, "y": equity - np.maximum.accumulate(equity), "title": "Drawdown"},
+        {"kind": "hist", "values": trades["PnL"].to_numpy(), "title": "PnL per Trade (pips)"},
+    ]
+
+
+def _slug(run):
+    # label อิสระ (params, ชื่อ strategy) -> ชื่อไฟล์ที่ปลอดภัย: ไม่มี / .. หรืออักขระแปลก
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", str(run)).strip("_")[:80] or "run"
+
+
+class ReportPool:
+    """Render charts for many runs in worker processes and write an index page."""
+
+    def __init__(self, out_dir=REPORT_DIR, workers=None, fmt="png"):
+        self.out_dir, self.fmt = out_dir, fmt
+        self.pool = ProcessPoolExecutor(workers)
+        self.runs = {}    # run -> [(title, future)]
+        self.slugs = {}   # run -> prefix ของชื่อไฟล์ (ไม่ซ้ำกันระหว่าง run)
+        os.makedirs(out_dir, exist_ok=True)
+
+    def _prefix(self, run):
+        if run not in self.slugs:
+            slug, used = _slug(run), set(self.slugs.values())
+            prefix, k = slug, 2
+            while prefix in used:
+                prefix, k = f"{slug}-{k}", k + 1
+            self.slugs[run] = prefix
+        return self.slugs[run]
+
+    def add(self, run, spec):
+        """Queue one chart; returns immediately. run is any label (sanitized for the file name)."""
+        n = len(self.runs.setdefault(run, []))
+        name = f"{self._prefix(run)}_{n:02d}_{spec['kind']}.{self.fmt}"
+        spec = dict(spec, path=os.path.join(self.out_dir, name))
+        self.runs[run].append((spec.get("title", spec["kind"]), self.pool.submit(render_chart, spec)))
+
+    def add_trades(self, run, trades):
+        for spec in trade_charts(trades):
+            self.add(run, spec)
+
+    def close(self):
+        """Wait for every chart, then write index.html; returns its path."""
+        self.pool.shutdown(wait=True)
+        parts = ["<!DOCTYPE html><html><head><meta charset='utf-8'><title>Backtest reports</title></head><body>"]
+        for run, charts in self.runs.items():
+            parts.append(f"<h2>{html.escape(str(run))}</h2>")
+            for title, future in charts:
+                if future.exception() is not None:
+                    parts.append(f"<p>{html.escape(title)}: render failed ({html.escape(str(future.exception()))})</p>")
+                    continue
+                src = html.escape(os.path.basename(future.result()))
+                parts.append(f"<figure><img src='{src}' alt='{html.escape(title)}'>"
+                             f"<figcaption>{html.escape(title)}</figcaption></figure>")
+        parts.append("</body></html>")
+        index = os.path.join(self.out_dir, "index.html")
+        with open(index, "w", encoding="utf-8") as f:
+            f.write("\n".join(parts))
+        return index
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+# === Cost what-if repricing ===
+# trade log แบบแยกขา (engine.LEG_COLUMNS: eur_pnl, gbp_pnl ก่อนหักค่าใช้จ่าย) -> หัก cost ของแต่ละ broker ใหม่
+# ไม่ต้องรัน backtest ซ้ำ เพราะ cost ไม่มีผลกับจังหวะเข้า/ออกของ model แยกขา (ออกตาม z อย่างเดียว)
+# ยกเว้น run ที่มี SL เป็น pip (engine.simulate): unrealized หัก cost ก่อนเทียบ SL -> ต้อง simulate ใหม่
+#
+# swap: เวลาใน data เป็นเวลา New York (session เปิดอาทิตย์ 17:00) -> rollover ทุกวันตอน 17:00
+#       คืนวันพุธคิด 3 เท่า (แทนเสาร์-อาทิตย์), rollover ตอน 17:00 วันเสาร์/อาทิตย์ ตลาดปิดไม่คิด
+# profile (pips): eur_spread, gbp_spread, commission ต่อรอบ, swap_per_day ต่อ rollover ที่ถือข้าม
+
+ROLLOVER_HOUR = 17
+SWAP_WEIGHTS = (1, 1, 3, 1, 1, 0, 0)   # จันทร์ .. อาทิตย์ (rollover ตอน 17:00 ของวันนั้น)
+
+BROKER_PROFILES = {
+    "default": {"eur_spread": 1.0, "gbp_spread": 1.5, "commission": 1.0, "swap_per_day": 0.0},   # 3.5 pips
+    "iux": {"eur_spread": 0.3, "gbp_spread": 0.3, "commission": 0.0, "swap_per_day": 0.0},       # 0.6 pips
+}
+
+
+def rollovers(entry_time, exit_time, rollover_hour=ROLLOVER_HOUR, weights=SWAP_WEIGHTS):
+    """Swap days charged while the trade was open (rollovers at rollover_hour, weighted by weekday)."""
+    # เลื่อนเวลาถอยไป rollover_hour -> วันที่ (นับจาก epoch) เปลี่ยนตอนผ่าน rollover พอดี
+    shift = np.int64(rollover_hour * 3600 * 10**9)
+    day = lambda t: (pd.DatetimeIndex(t).as_unit("ns").asi8 - shift) // (86_400 * 10**9)
+    w = np.asarray(weights, dtype=np.float64)
+    cum = np.cumsum(w)
+    # น้ำหนักสะสมของ rollover ทุกวันถึงวันที่ d (1970-01-01 เป็นวันพฤหัส = weekday 3)
+    total = lambda d: (d + 3) // 7 * cum[-1] + cum[(d + 3) % 7]
+    return total(day(exit_time)) - total(day(entry_time))
+
+
+def cost_matrix(trades, profiles, rollover_hour=ROLLOVER_HOUR):
+    """(profiles x trades) round-trip cost in pips."""
+    nights = rollovers(trades["entry_time"], trades["exit_time"], rollover_hour)
+    p = pd.DataFrame.from_dict(profiles, orient="index").reindex(
+        columns=["eur_spread", "gbp_spread", "commission", "swap_per_day"]).fillna(0.0)
+    fixed = (p["eur_spread"] + p["gbp_spread"] + p["commission"]).to_numpy()
+    return fixed[:, None] + p["swap_per_day"].to_numpy()[:, None] * nights[None, :]
+
+
+def reprice(trades, profiles=BROKER_PROFILES):
+    """Restated trade log per profile: {name: trades with cost, net_pnl and equity}."""
+    gross = (trades["eur_pnl"] + trades["gbp_pnl"]).to_numpy(np.float64)
+    net = gross[None, :] - cost_matrix(trades, profiles)
+    out = {}
+    for k, name in enumerate(profiles):
+        restated = trades.copy()
+        restated["cost"] = gross - net[k]
+        restated["net_pnl"] = net[k]
+        restated["equity"] = np.cumsum(net[k])
+        out[name] = restated
+    return out
+
+
+def reprice_stats(trades, profiles=BROKER_PROFILES):
+    """Summary stats of every profile at once (same metrics as the leg-PnL scripts)."""
+    gross = (trades["eur_pnl"] + trades["gbp_pnl"]).to_numpy(np.float64)
+    net = gross[None, :] - cost_matrix(trades, profiles)
+    if net.shape[1] == 0:
+        return pd.DataFrame({"Total trades": 0}, index=pd.Index(list(profiles), name="profile"))
+    equity = np.cumsum(net, axis=1)
+    std = net.std(axis=1, ddof=1) if net.shape[1] > 1 else np.zeros(len(net))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sharpe = np.where(std > 0, net.mean(axis=1) / std * np.sqrt(252), 0.0)
+    return pd.DataFrame({
+        "Total trades": net.shape[1],
+        "Total PnL": equity[:, -1],
+        "Win rate": (net > 0).mean(axis=1) * 100,
+        "Avg PnL": net.mean(axis=1),
+        "Max DD": (np.maximum.accumulate(equity, axis=1) - equity).max(axis=1),
+        "Sharpe": sharpe,
+    }, index=pd.Index(list(profiles), name="profile"))
+
+
+def needs_resimulation(runs):
+    """True for runs whose exits depend on cost (pip SL in engine.simulate) -> re-run, don't reprice.
+
+    runs: one parameter dict or a DataFrame of runs (e.g. a sweep summary with an SL column).
+    """
+    if isinstance(runs, dict):
+        return bool(pd.notna(runs.get("SL")))
+    if "SL" not in runs:
+        return pd.Series(False, index=runs.index)
+    return runs["SL"].notna()
+
+
+if __name__ == "__main__":
+    from datastore import load_pair
+    from engine import simulate_multi_target
+    from indicators import make_indicators
+
+    df = make_indicators(load_pair("M15"), 20)
+    trades = simulate_multi_target(df.index, df["EURUSD"], df["GBPUSD"], df["zscore"], df["corr"],
+                                   [0.5], z_threshold=2.0, corr_threshold=0.8, z_sl=3.0, cost=0.0)[0.5]
+    profiles = dict(BROKER_PROFILES)
+    profiles["ecn_swap"] = {"eur_spread": 0.2, "gbp_spread": 0.4, "commission": 0.7, "swap_per_day": 0.5}
+    print(reprice_stats(trades, profiles).round(2).to_string())
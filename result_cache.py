@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from datastore import CACHE_DIR
+from engine import ENGINE_VERSION
+from indicator_store import data_fingerprint
+
+# === Content-addressed backtest result cache ===
+# key = hash(data fingerprint, strategy, params, ENGINE_VERSION) -> trade log + equity + stats
+# รันสคริปต์เดิมด้วยข้อมูล / params เดิม = โหลดผลเก่า ไม่ต้อง simulate ใหม่
+# แต่ละ run = data/cache/results/<key>/ (trades.pkl, equity.npy, meta.json)
+# mtime ของ meta.json = ใช้ล่าสุด -> เกิน max_bytes ลบตัวที่ไม่ได้ใช้นานสุดก่อน
+
+RESULT_DIR = os.path.join(CACHE_DIR, "results")
+
+
+def run_key(fingerprint, strategy, params):
+    """Stable hash of everything that determines a backtest's output."""
+    blob = json.dumps({"data": fingerprint, "strategy": strategy, "params": params,
+                       "engine": ENGINE_VERSION}, sort_keys=True, default=str)
+    return hashlib.blake2b(blob.encode(), digest_size=16).hexdigest()
+
+
+def log_stats(trades, pnl_col="PnL"):
+    """Trades / Total PnL / Win rate / Avg PnL / Max DD of a trade log."""
+    pnl = trades[pnl_col].to_numpy(np.float64) if len(trades) else np.empty(0)
+    if len(pnl) == 0:
+        return {"Trades": 0, "Total PnL": 0.0, "Win rate": 0.0, "Avg PnL": 0.0, "Max DD": 0.0}
+    equity = np.cumsum(pnl)
+    return {
+        "Trades": len(pnl),
+        "Total PnL": float(equity[-1]),
+        "Win rate": float((pnl > 0).mean()),
+        "Avg PnL": float(pnl.mean()),
+        "Max DD": float((np.maximum.accumulate(equity) - equity).max()),
+    }
+
+
+class ResultCache:
+    """On-disk store of backtest results keyed by run_key(), with LRU size eviction."""
+
+    def __init__(self, root=RESULT_DIR, max_bytes=512 * 2**20):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = self.misses = 0
+
+    def _dir(self, key):
+        return os.path.join(self.root, key)
+
+    def _read_meta(self, key):
+        try:
+            with open(os.path.join(self._dir(key), "meta.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get(self, key):
+        """{"trades", "equity", "stats", "meta"} or None."""
+        meta = self._read_meta(key)
+        if meta is None:
+            self.misses += 1
+            return None
+        path = self._dir(key)
+        try:
+            trades = pd.read_pickle(os.path.join(path, "trades.pkl"))
+            equity = np.load(os.path.join(path, "equity.npy"))
+        except (OSError, ValueError, EOFError):
+            self.misses += 1
+            return None
+        os.utime(os.path.join(path, "meta.json"))   # ใช้ล่าสุด
+        self.hits += 1
+        return {"trades": trades, "equity": equity, "stats": meta["stats"], "meta": meta}
+
+    def put(self, key, trades, equity, stats, **info):
+        """Store one run (written to a temp dir first, then renamed into place)."""
+        path = self._dir(key)
+        tmp = f"{path}.tmp{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        trades.to_pickle(os.path.join(tmp, "trades.pkl"))
+        np.save(os.path.join(tmp, "equity.npy"), np.asarray(equity, dtype=np.float64))
+        size = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp))
+        meta = dict(info, key=key, stats=stats, engine=ENGINE_VERSION, created=time.time(), bytes=size)
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=1, default=str)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        self.evict(keep=key)
+        return path
+
+    def _entries(self):
+        if not os.path.isdir(self.root):
+            return []
+        out = []
+        for key in os.listdir(self.root):
+            meta_path = os.path.join(self.root, key, "meta.json")
+            if ".tmp" in key or not os.path.exists(meta_path):
+                continue
+            out.append((os.path.getmtime(meta_path), key))
+        return sorted(out)
+
+    def evict(self, keep=None):
+        """Drop least recently used runs until the store fits in max_bytes; returns removed keys.
+
+        keep: a key that is never dropped (the run put() just wrote, even if it alone exceeds max_bytes).
+        """
+        entries = self._entries()
+        sizes = {key: (self._read_meta(key) or {}).get("bytes", 0) for _, key in entries}
+        total = sum(sizes.values())
+        removed = []
+        for _, key in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self._dir(key), ignore_errors=True)
+            total -= sizes[key]
+            removed.append(key)
+        return removed
+
+    def list_runs(self):
+        """One row per cached run: key, strategy, params, stats, created, last used."""
+        rows = []
+        for used, key in self._entries():
+            meta = self._read_meta(key)
+            if meta is None:
+                continue
+            rows.append(dict(key=key, strategy=meta.get("strategy"), params=json.dumps(meta.get("params")),
+                             **meta["stats"], created=pd.Timestamp(meta["created"], unit="s"),
+                             last_used=pd.Timestamp(used, unit="s")))
+        return pd.DataFrame(rows)
+
+    def compare(self, keys):
+        """Stats of several runs side by side (columns = keys)."""
+        return pd.DataFrame({key: self._read_meta(key)["stats"] for key in keys})
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+default_cache = ResultCache()
+
+
+def cached_backtest(df, run, params=None, columns=None, cache=None, pnl_col="PnL", runs=None, tf="",
+                    reports=None):
+    """run(df, **params) -> trade log, skipped when the same data / strategy / params are cached.
+
+    columns: the df columns run() reads (default: all); only these go into the fingerprint.
+    runs: optional run_store.RunStore that records every freshly simulated run.
+    reports: optional report.ReportPool; the run's charts are queued there (rendered in the background).
+    Returns {"trades", "equity", "stats", "key", "cached"}.
+    """
+    cache = cache or default_cache
+    params = dict(params or {})
+    columns = list(columns or df.columns)
+    strategy = f"{run.__module__}.{run.__qualname__}"
+    key = run_key(data_fingerprint(df, columns), strategy, params)
+
+    hit = cache.get(key)
+    if hit is not None:
+        out = dict(hit, key=key, cached=True)
+    else:
+        trades = run(df, **params)
+        equity = trades["equity"].to_numpy() if "equity" in trades else np.cumsum(trades[pnl_col].to_numpy())
+        stats = log_stats(trades, pnl_col)
+        cache.put(key, trades, equity, stats, strategy=strategy, params=params, columns=columns)
+        if runs is not None:
+            runs.record(params, stats, trades, equity, strategy=strategy, tf=tf)
+        out = {"trades": trades, "equity": equity, "stats": stats, "key": key, "cached": False}
+    if reports is not None:
+        reports.add_trades(f"{tf} {run.__qualname__} {json.dumps(params, sort_keys=True, default=str)}".strip(),
+                           out["trades"])
+    return out
+
+
+if __name__ == "__main__":
+    runs = default_cache.list_runs()
+    print(runs.to_string(index=False) if len(runs) else "result cache is empty")
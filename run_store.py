@@ -0,0 +1,159 @@
+import json
+import math
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from datastore import DATA_DIR
+from engine import as_ns
+
+# === Run history (SQLite) ===
+# ทุก run เก็บ params + summary stats เป็นคอลัมน์ (มี index) -> query top-N จากหลักแสน run ได้ทันที
+# trade log / equity curve เก็บแยกตาราง (เฉพาะ run ที่ส่งมา) ไม่ทับกันเหมือนไฟล์ CSV
+# params ที่ไม่มีคอลัมน์ของตัวเองอยู่ใน params (JSON)
+
+RUN_DB = os.path.join(DATA_DIR, "runs.sqlite")
+
+PARAM_COLUMNS = ("window", "z_threshold", "corr_threshold", "tp1", "tp2", "SL", "z_sl", "cost")
+# trade_stats() / result_cache.log_stats key -> คอลัมน์
+STAT_COLUMNS = {"Trades": "trades", "Total PnL": "total_pnl", "Win rate": "win_rate", "Avg PnL": "avg_pnl",
+                "Max DD": "max_dd", "Max In-trade DD": "max_trade_dd", "Avg Hold": "avg_hold"}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    strategy TEXT NOT NULL DEFAULT '',
+    tf TEXT NOT NULL DEFAULT '',
+    params TEXT NOT NULL,
+    {", ".join(f'"{c}" REAL' for c in PARAM_COLUMNS)},
+    {", ".join(f"{c} REAL" for c in STAT_COLUMNS.values())},
+    pnl_dd REAL
+);
+CREATE INDEX IF NOT EXISTS runs_created ON runs (created);
+CREATE INDEX IF NOT EXISTS runs_params ON runs (strategy, tf, "window", z_threshold, corr_threshold);
+CREATE INDEX IF NOT EXISTS runs_total_pnl ON runs (total_pnl);
+CREATE INDEX IF NOT EXISTS runs_pnl_dd ON runs (pnl_dd);
+CREATE INDEX IF NOT EXISTS runs_trades ON runs (trades);
+CREATE TABLE IF NOT EXISTS trades (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    entry_ns INTEGER, exit_ns INTEGER, pnl REAL, trade_dd REAL
+);
+CREATE INDEX IF NOT EXISTS trades_run ON trades (run_id);
+CREATE TABLE IF NOT EXISTS curves (
+    run_id INTEGER PRIMARY KEY REFERENCES runs (id) ON DELETE CASCADE,
+    equity BLOB
+);
+"""
+
+
+def _num(v):
+    return None if v is None or (isinstance(v, float) and np.isnan(v)) else float(v)
+
+
+def _pnl_dd(pnl, dd):
+    # DD = 0 -> +inf / -inf ตามทิศ PnL (ไม่ใช่ NULL ที่ ORDER BY DESC เอาไปไว้ท้ายสุด)
+    pnl, dd = _num(pnl), _num(dd)
+    if pnl is None or dd is None:
+        return None
+    if dd == 0:
+        return math.copysign(math.inf, pnl) if pnl else None
+    return pnl / dd
+
+
+class RunStore:
+    """Append-only history of backtest runs in one SQLite file."""
+
+    def __init__(self, path=RUN_DB):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA foreign_keys=ON")
+        self.db.executescript(SCHEMA)
+        # DB เก่าเก็บ pnl_dd ของ run ที่ DD = 0 เป็น NULL
+        with self.db:
+            self.db.execute("UPDATE runs SET pnl_dd = CASE WHEN total_pnl > 0 THEN 9e999 ELSE -9e999 END "
+                            "WHERE pnl_dd IS NULL AND max_dd = 0 AND total_pnl != 0")
+
+    def _row(self, params, stats, strategy, tf, created):
+        params = {k: (v.item() if isinstance(v, np.generic) else v) for k, v in params.items()}
+        row = [created, strategy, tf, json.dumps(params, sort_keys=True, default=str)]
+        row += [_num(params.get(c)) for c in PARAM_COLUMNS]
+        row += [_num(stats.get(k)) for k in STAT_COLUMNS]
+        row.append(_pnl_dd(stats.get("Total PnL"), stats.get("Max DD")))
+        return row
+
+    def _insert_sql(self):
+        cols = ["created", "strategy", "tf", "params", *(f'"{c}"' for c in PARAM_COLUMNS),
+                *STAT_COLUMNS.values(), "pnl_dd"]
+        return f"INSERT INTO runs ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})"
+
+    def record(self, params, stats, trades=None, equity=None, strategy="", tf=""):
+        """Store one run; trades = trade log (entry, exit, PnL, tradeDD). Returns the run id."""
+        with self.db:
+            cur = self.db.execute(self._insert_sql(), self._row(params, stats, strategy, tf, time.time()))
+            run_id = cur.lastrowid
+            if trades is not None and len(trades):
+                dd = trades["tradeDD"] if "tradeDD" in trades else pd.Series(np.nan, index=trades.index)
+                self.db.executemany(
+                    "INSERT INTO trades (run_id, entry_ns, exit_ns, pnl, trade_dd) VALUES (?, ?, ?, ?, ?)",
+                    zip([run_id] * len(trades), as_ns(trades["entry"]).tolist(), as_ns(trades["exit"]).tolist(),
+                        trades["PnL"].astype(float).tolist(), dd.astype(float).tolist()))
+            if equity is not None:
+                self.db.execute("INSERT INTO curves (run_id, equity) VALUES (?, ?)",
+                                (run_id, np.asarray(equity, dtype=np.float64).tobytes()))
+        return run_id
+
+    def record_many(self, summary, strategy="", tf=""):
+        """Store a sweep summary (one row per grid point: params + trade_stats columns) in one transaction."""
+        created = time.time()
+        stat_keys = set(STAT_COLUMNS)
+        rows = []
+        for rec in summary.to_dict("records"):
+            stats = {k: v for k, v in rec.items() if k in stat_keys}
+            params = {k: v for k, v in rec.items() if k not in stat_keys}
+            rows.append(self._row(params, stats, strategy, tf, created))
+        with self.db:
+            self.db.executemany(self._insert_sql(), rows)
+        return len(rows)
+
+    def query(self, sql, args=()):
+        return pd.read_sql_query(sql, self.db, params=args)
+
+    def top(self, n=20, by="pnl_dd", where="trades > 50", args=()):
+        """Best n runs by a stats column, e.g. top(20, "pnl_dd", "trades > 50 AND tf = ?", ("H1",))."""
+        if by not in (*STAT_COLUMNS.values(), "pnl_dd"):
+            raise ValueError(f"Unknown stats column: {by}")
+        where = f"WHERE {where}" if where else ""
+        return self.query(f"SELECT * FROM runs {where} ORDER BY {by} DESC LIMIT ?", (*args, n))
+
+    def trades(self, run_id):
+        df = self.query("SELECT entry_ns, exit_ns, pnl, trade_dd FROM trades WHERE run_id = ? ORDER BY rowid",
+                        (run_id,))
+        return pd.DataFrame({
+            "entry": pd.to_datetime(df["entry_ns"], unit="ns"),
+            "exit": pd.to_datetime(df["exit_ns"], unit="ns"),
+            "PnL": df["pnl"],
+            "tradeDD": df["trade_dd"],
+        })
+
+    def equity(self, run_id):
+        row = self.db.execute("SELECT equity FROM curves WHERE run_id = ?", (run_id,)).fetchone()
+        return np.frombuffer(row[0], dtype=np.float64) if row else None
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    with RunStore() as store:
+        print(store.top(20).drop(columns="params").to_string(index=False))
@@ -0,0 +1,67 @@
+import itertools
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from datastore import DATA_DIR, load_pair
+from indicators import rolling_pair_kernel
+
+# === Multi-pair correlation scanner ===
+# โหลด N symbols แล้วคำนวณ rolling corr + spread z-score ของทุกคู่ N*(N-1)/2
+# แต่ละคู่ใช้ kernel เดียวกับ EURUSD/GBPUSD (indicators.rolling_pair_kernel): block prefix sums
+# -> error ไม่สะสมตลอดประวัติ และ NaN ทำให้ NaN เฉพาะ window ที่มี NaN อยู่
+
+
+def find_symbols(tf, year=2024, data_dir=None):
+    pat = re.compile(rf"^([A-Z]{{6}})_{tf}_{year}\.csv$")
+    names = (pat.match(f) for f in sorted(os.listdir(data_dir or DATA_DIR)))
+    return [m.group(1) for m in names if m]
+
+
+def pair_stats(closes, window, pairs=None):
+    """Rolling corr and spread z-score for every pair of columns.
+
+    closes: aligned close prices (DataFrame, one column per symbol).
+    Returns (corr, zscore) DataFrames of shape bars x pairs, columns "A/B" (spread = A - B).
+    Each pair column is indicators.rolling_pair_kernel of its two legs.
+    """
+    symbols = list(closes.columns)
+    col = {s: k for k, s in enumerate(symbols)}
+    pairs = pairs or list(itertools.combinations(symbols, 2))
+    x = np.asfortranarray(closes.to_numpy(np.float64))   # column ละ symbol ต่อเนื่องใน memory
+
+    corr = np.empty((len(x), len(pairs)), order="F")
+    zscore = np.empty((len(x), len(pairs)), order="F")
+    spread = np.empty(len(x))
+    for k, (a, b) in enumerate(pairs):
+        out = {"spread": spread, "zscore": zscore[:, k], "corr": corr[:, k]}
+        rolling_pair_kernel(x[:, col[a]], x[:, col[b]], window, out)
+
+    names = [f"{p[0]}/{p[1]}" for p in pairs]
+    return (pd.DataFrame(corr, index=closes.index, columns=names),
+            pd.DataFrame(zscore, index=closes.index, columns=names))
+
+
+def scan(closes, window, z_threshold=2.0, corr_threshold=0.8, at=-1):
+    """Rank all pairs at bar `at` by |z|; qualified = corr > corr_threshold and |z| > z_threshold."""
+    # ใช้แค่ window แท่งสุดท้ายถึง `at` ก็พอ ไม่ต้องคำนวณทั้งประวัติ
+    pos = at % len(closes)
+    recent = closes.iloc[max(pos - window + 1, 0):pos + 1]
+    corr, zscore = pair_stats(recent, window)
+    table = pd.DataFrame({"corr": corr.iloc[-1], "zscore": zscore.iloc[-1]})
+    table.index.name = "pair"
+    table["side"] = np.where(table["zscore"] > 0, "short", "long")
+    table["qualified"] = (table["corr"] > corr_threshold) & (table["zscore"].abs() > z_threshold)
+    table["abs_z"] = table["zscore"].abs()
+    table = table.sort_values(["qualified", "abs_z"], ascending=False).drop(columns="abs_z")
+    return table
+
+
+if __name__ == "__main__":
+    tf, window = "H1", 50
+    symbols = find_symbols(tf)
+    closes = load_pair(tf, symbols=symbols)
+    print(f"Scan {len(symbols)} symbols ({len(symbols) * (len(symbols) - 1) // 2} pairs) at {closes.index[-1]}")
+    print(scan(closes, window).to_string())
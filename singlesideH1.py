@@ -1,18 +1,16 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+from datastore import load_pair
+from report import show
+from indicators import make_indicators
 
 # --- Load Data (H1 for example) ---
-eur = pd.read_csv("data/EURUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
-gbp = pd.read_csv("data/GBPUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
-
-df = pd.DataFrame({"EURUSD": eur["close"], "GBPUSD": gbp["close"]}).dropna()
+df = load_pair("H1")
 
 # --- Indicators ---
 window = 20
-df["spread"] = df["EURUSD"] - df["GBPUSD"]
-df["zscore"] = (df["spread"] - df["spread"].rolling(window).mean()) / df["spread"].rolling(window).std()
-df["corr"] = df["EURUSD"].rolling(window).corr(df["GBPUSD"])
+df = make_indicators(df, window)
 
 # --- Parameters ---
 SL = 20      # stoploss in pips
@@ -62,4 +60,4 @@ plt.title("Equity Curve (Single-side EURUSD, SL=20, TP=40, Corr>0.8, Z>2)")
 plt.xlabel("Date")
 plt.ylabel("Cumulative PnL (pips)")
 plt.grid(True)
-plt.show()
+show()
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from montecarlo import compound, drawdowns
+
+# === Position-sizing grid ===
+# equity_1percent.py ทบต้นทีละไม้ด้วย risk / SL เดียว -> ที่นี่ทำทุกคู่ (balance x risk x SL) พร้อมกัน
+# sizing / DD ใช้ montecarlo.compound และ drawdowns ตัวเดียวกัน: lot = equity * risk / (SL * $10)
+# equity เป็นสัดส่วนกับ balance เริ่มต้น -> cumprod ทำแค่ (risk x SL) แล้วคูณ balance ตอนท้าย
+# floating DD ของไม้ = equity ก่อนเข้าไม้ * risk/SL * tradeDD
+
+
+def sizing_grid(trades, risk_percents=(0.01,), SLs=(30,), balances=(1000,)):
+    """Compounded equity and floating-equity trough for every sizing setting.
+
+    trades: trade log with PnL and tradeDD (pips), e.g. trade_log_partial_noSL.csv.
+    Returns {"equity", "trough"} shaped (balances, risks, SLs, trades + 1), column 0 = start,
+    plus the setting axes.
+    """
+    pnl = trades["PnL"].to_numpy(np.float64)
+    trade_dd = np.minimum(trades["tradeDD"].to_numpy(np.float64), 0) if "tradeDD" in trades \
+        else np.zeros_like(pnl)
+    risk = np.asarray(risk_percents, dtype=np.float64)
+    sl = np.asarray(SLs, dtype=np.float64)
+    balance = np.asarray(balances, dtype=np.float64)
+
+    k = (risk[:, None] / sl[None, :])[..., None]          # (risks, SLs, 1)
+    ratio, trough = compound(pnl, trade_dd, k)
+
+    scale = balance[:, None, None, None]
+    return {"equity": scale * ratio, "trough": scale * trough,
+            "balances": balance, "risk_percents": risk, "SLs": sl}
+
+
+def sizing_summary(grid):
+    """One row per (balance, risk, SL): final equity, return and max DD incl. floating."""
+    equity, trough = grid["equity"], grid["trough"]
+    dd_pct, dd_usd = drawdowns(equity, trough)
+
+    b, r, s = np.meshgrid(grid["balances"], grid["risk_percents"], grid["SLs"], indexing="ij")
+    start = equity[..., 0]
+    return pd.DataFrame({
+        "balance": b.ravel(),
+        "risk_percent": r.ravel(),
+        "SL": s.ravel(),
+        "final_equity": equity[..., -1].ravel(),
+        "return_pct": ((equity[..., -1] / start - 1) * 100).ravel(),
+        "max_dd_pct": (dd_pct.min(axis=-1) * 100).ravel(),
+        "max_dd_usd": dd_usd.min(axis=-1).ravel(),
+        "min_equity": trough.min(axis=-1).ravel(),
+    })
+
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+    from report import show
+
+    trades = pd.read_csv("trade_log_partial_noSL.csv")
+    risks = np.round(np.arange(0.0025, 0.0501, 0.0025), 4)
+    grid = sizing_grid(trades, risk_percents=risks, SLs=[20, 30, 50], balances=[1000, 10000])
+    summary = sizing_summary(grid)
+    print(summary[summary["balance"] == 1000].round(2).to_string(index=False))
+
+    # return vs DD ของแต่ละ SL normalization (balance ไม่มีผลกับ %)
+    plt.figure(figsize=(10, 6))
+    for sl, part in summary[summary["balance"] == 1000].groupby("SL"):
+        plt.plot(-part["max_dd_pct"], part["return_pct"], marker="o", label=f"SL={sl:g}")
+    plt.xlabel("Max DD incl. floating (%)")
+    plt.ylabel("Return (%)")
+    plt.title("Risk per Trade: Return vs Drawdown")
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    show()
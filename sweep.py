@@ -0,0 +1,145 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from datastore import load_pair
+from engine import as_ns, simulate, simulate_windows, to_trade_log, trade_stats
+from indicator_store import default_store
+from run_store import RunStore
+
+# === Parallel parameter sweep ===
+# grid: z_threshold x corr_threshold x window x TP/SL x cost -> กระจายให้ process pool
+# ราคา + indicator ของแต่ละ window publish ลง shared memory ครั้งเดียว worker attach เอง (ไม่ pickle array)
+# window เป็น column ของ matrix zscore / corr (bars x windows) -> sweep window แทบไม่มีต้นทุนเพิ่ม
+# ไม่ผ่าน result_cache: worker เห็นแค่ array ใน shared memory (ไม่มี df ให้ fingerprint) และแต่ละจุดคืนแค่สถิติ
+# เขียน trade log ลงดิสก์ทีละจุดแพงกว่า simulate เอง -> summary ทั้งชุดเก็บใน RunStore แทน
+
+SIM_PARAMS = ("z_threshold", "corr_threshold", "tp1", "tp2", "SL", "z_sl", "cost")
+
+
+def make_grid(**axes):
+    """Cartesian product of parameter lists -> list of dicts."""
+    keys = list(axes)
+    return [dict(zip(keys, values)) for values in itertools.product(*(axes[k] for k in keys))]
+
+
+class SharedArrays:
+    """Publish named numpy arrays into shared memory; spec is small and picklable."""
+
+    def __init__(self, arrays):
+        self.blocks, self.spec = [], {}
+        for name, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+            np.ndarray(arr.shape, arr.dtype, buffer=shm.buf)[...] = arr
+            self.blocks.append(shm)
+            self.spec[name] = (shm.name, arr.shape, arr.dtype.str)
+
+    def close(self):
+        for shm in self.blocks:
+            shm.close()
+            shm.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach(spec):
+    """Map a SharedArrays spec back to numpy arrays (the blocks must stay referenced)."""
+    blocks, arrays = [], {}
+    for name, (shm_name, shape, dtype) in spec.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        blocks.append(shm)
+        arrays[name] = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+    return blocks, arrays
+
+
+# --- worker side ---
+_worker = {}
+
+
+def init_worker(spec):
+    """Pool initializer: attach the published arrays once per worker process."""
+    _worker["blocks"], _worker["arrays"] = attach(spec)
+
+
+def worker_arrays():
+    return _worker["arrays"]
+
+
+def window_column(arrays, window):
+    return int(np.searchsorted(arrays["windows"], window))
+
+
+def evaluate_points(arrays, points, stop=None):
+    """trade_stats of every grid point on bars [0, stop) of the published arrays, in the order of points."""
+    stop = len(arrays["time"]) if stop is None else stop
+    # จุดที่ต่างกันแค่ window -> simulate_windows รันทุก column ในรอบเดียว
+    # ผลลัพธ์คืนตามลำดับของ points (optimizer ใช้ตำแหน่ง row แทน config)
+    groups = {}
+    for i, p in enumerate(points):
+        params = tuple((k, p[k]) for k in SIM_PARAMS if k in p)
+        groups.setdefault(params, []).append(i)
+    out = [None] * len(points)
+    for params, idx in groups.items():
+        cols = [window_column(arrays, points[i]["window"]) for i in idx]
+        results = simulate_windows(arrays["spread"][:stop], arrays["zscore"][:stop, cols],
+                                   arrays["corr"][:stop, cols], **dict(params))
+        for i, res in zip(idx, results):
+            out[i] = dict(points[i], **trade_stats(res, arrays["time"]))
+    return out
+
+
+def _run_chunk(points):
+    return evaluate_points(worker_arrays(), points)
+
+
+def publish_indicators(df, windows, tf="", store=None):
+    """time, spread and (bars x windows) zscore / corr matrices, ready for SharedArrays."""
+    store = store or default_store
+    windows = sorted(set(windows))
+    arrays = {"time": as_ns(df.index), "windows": np.asarray(windows, dtype=np.int64)}
+    arrays.update(store.get_matrix(df, windows, tf))
+    return arrays
+
+
+def run_sweep(df, grid, workers=None, chunk=64, tf="", store=None):
+    """Run every grid point (dict with window + engine params) in a process pool -> summary DataFrame."""
+    workers = workers or os.cpu_count()
+    chunks = [grid[i:i + chunk] for i in range(0, len(grid), chunk)]
+    with SharedArrays(publish_indicators(df, [p["window"] for p in grid], tf, store)) as shared:
+        with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(shared.spec,)) as pool:
+            rows = [row for part in pool.map(_run_chunk, chunks) for row in part]
+    return pd.DataFrame(rows)
+
+
+def report_top(reports, df, summary, top=5, objective="Total PnL", tf="", store=None):
+    """Queue equity / drawdown / PnL charts of the `top` best sweep rows on a ReportPool (returns at once)."""
+    store = store or default_store
+    for _, row in summary.sort_values(objective, ascending=False).head(top).iterrows():
+        params = {k: (None if pd.isna(row[k]) else row[k]) for k in SIM_PARAMS if k in row}
+        ind = store.get(df, int(row["window"]), tf)
+        res = simulate(ind["spread"], ind["zscore"], ind["corr"], **params)
+        label = " ".join(f"{k}={v}" for k, v in dict(window=int(row["window"]), **params).items())
+        reports.add_trades(f"{tf} {label}".strip(), to_trade_log(df.index, res))
+
+
+if __name__ == "__main__":
+    from report import ReportPool
+
+    df = load_pair("H1")
+    grid = make_grid(z_threshold=[2.0, 2.5], corr_threshold=[0.8, 0.9], window=[20, 50],
+                     tp1=[1.0, 0.5], tp2=[0.1], SL=[None, 30], cost=[1.2])
+    summary = run_sweep(df, grid, tf="H1")
+    with RunStore() as runs, ReportPool() as reports:
+        runs.record_many(summary, strategy="engine.simulate", tf="H1")
+        report_top(reports, df, summary, tf="H1")   # กราฟวาดใน pool ระหว่างพิมพ์ผล
+        print(summary.sort_values("Total PnL", ascending=False).head(20).to_string(index=False))
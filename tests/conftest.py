@@ -0,0 +1,5 @@
+import os
+import sys
+
+# สคริปต์ / module อยู่ที่ root ของ repo (ไม่มี package)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from datastore import load_range
+
+
+def _write_year(data_dir, year, seed):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(f"{year}-01-01", f"{year}-12-31 23:00", freq="h", name="datetime")
+    frames = {}
+    for symbol, base in (("EURUSD", 1.10), ("GBPUSD", 1.30)):
+        close = np.round(base + np.cumsum(rng.normal(0, 3e-4, len(index))), 5)
+        df = pd.DataFrame({"open": close, "high": close, "low": close, "close": close, "volume": 0}, index=index)
+        df.to_csv(data_dir / f"{symbol}_H1_{year}.csv")
+        frames[symbol] = df["close"]
+    return pd.DataFrame(frames)
+
+
+@pytest.fixture
+def store(tmp_path):
+    data_dir, cache_dir = tmp_path / "data", tmp_path / "cache"
+    data_dir.mkdir()
+    # ปี 2023 ไม่มีข้อมูล
+    full = pd.concat([_write_year(data_dir, 2022, 0), _write_year(data_dir, 2024, 1)])
+    full.index = full.index.as_unit("ns")
+    return full, dict(data_dir=str(data_dir), cache_dir=str(cache_dir))
+
+
+@pytest.mark.parametrize("start, end", [
+    ("2024-02", "2024-02"),
+    ("2024", "2024"),
+    ("2024-02-05", "2024-02-05"),
+    ("2024-02-05 13", "2024-03-01 13"),
+    ("2022-12-30", "2024-01-02"),
+    (pd.Timestamp("2024-02-05 13:00"), pd.Timestamp("2024-02-06 02:00")),
+])
+def test_load_range_matches_loc(store, start, end):
+    full, dirs = store
+    df = load_range("H1", start, end, **dirs)
+    pd.testing.assert_frame_equal(df, full.loc[start:end], check_freq=False)
+
+
+def test_missing_first_year(store):
+    full, dirs = store
+    df = load_range("H1", "2023-12-20", "2024-01-05", warmup=10, **dirs)
+    # 2023 ไม่มี -> ไม่มี warm-up ให้ (ไม่ข้ามไปเอาท้ายปี 2022)
+    pd.testing.assert_frame_equal(df, full.loc["2023-12-20":"2024-01-05"], check_freq=False)
+    with pytest.raises(FileNotFoundError):
+        load_range("H1", "2023-03-01", "2023-04-01", **dirs)
+
+
+def test_warmup_crosses_year(store):
+    full, dirs = store
+    df = load_range("H1", "2022-12-31 20:00", "2022-12-31 23:00", warmup=5, **dirs)
+    assert len(df) == 9
+    pd.testing.assert_frame_equal(df, full.iloc[len(full.loc[:"2022"]) - 9:len(full.loc[:"2022"])],
+                                  check_freq=False)
@@ -0,0 +1,204 @@
+import numpy as np
+import pandas as pd
+
+from engine import EXIT_END, EXIT_SL, EXIT_TP, EXIT_ZSL, PIP, backtest_partial, simulate, simulate_windows
+
+
+# === Reference: เดิน state machine ทีละแท่ง ===
+# ช้าแต่ตรงตัว ใช้ตรวจว่า first-passage ของ engine.simulate ได้ไม้ชุดเดียวกัน
+def simulate_bars(spread, zscore, corr, z_threshold=2.0, corr_threshold=0.8,
+                  tp1=1.0, tp2=0.1, SL=None, z_sl=None, cost=1.2, close_open=False):
+    """Bar-by-bar reference of engine.simulate() (same arguments and output).
+
+    Returns a dict of numpy arrays, one row per closed trade:
+    entry_idx, exit_idx, PnL, tradeDD, result.
+    """
+    spread = np.asarray(spread, dtype=np.float64).tolist()
+    zscore = np.asarray(zscore, dtype=np.float64).tolist()
+    corr = np.asarray(corr, dtype=np.float64).tolist()
+
+    entry_idx, exit_idx, pnl_out, dd_out, result = [], [], [], [], []
+    half_cost = cost / 2
+    in_trade = False
+    entry_i, entry_z, entry_spread = 0, 0.0, 0.0
+    partial_taken, partial_pnl, worst_unreal = False, 0.0, 0.0
+
+    for i in range(len(zscore)):
+        z = zscore[i]
+
+        if not in_trade:
+            # Entry
+            if abs(z) > z_threshold and corr[i] > corr_threshold:
+                in_trade, entry_i, entry_z, entry_spread = True, i, z, spread[i]
+                partial_taken, partial_pnl, worst_unreal = False, 0.0, 0.0
+            continue
+
+        # Unrealized
+        if entry_z > 0:
+            move = (spread[i] - entry_spread) * PIP
+        else:
+            move = (entry_spread - spread[i]) * PIP
+        unrealized = move - cost
+        if unrealized < worst_unreal:
+            worst_unreal = unrealized
+
+        reason = None
+        if SL is not None and unrealized <= -SL:
+            reason, trade_pnl = EXIT_SL, unrealized + partial_pnl
+        elif z_sl is not None and abs(z) >= z_sl:
+            reason, trade_pnl = EXIT_ZSL, unrealized + partial_pnl
+        else:
+            if not partial_taken and abs(z) <= tp1:   # partial 50%
+                partial_taken, partial_pnl = True, (abs(entry_z - z) * 10) / 2 - half_cost
+            if abs(z) < tp2:
+                reason, trade_pnl = EXIT_TP, partial_pnl + ((abs(entry_z - z) * 10) / 2 - half_cost)
+
+        if reason is None and close_open and i == len(zscore) - 1:
+            reason, trade_pnl = EXIT_END, unrealized + partial_pnl
+
+        if reason is not None:
+            entry_idx.append(entry_i)
+            exit_idx.append(i)
+            pnl_out.append(trade_pnl)
+            dd_out.append(worst_unreal)
+            result.append(reason)
+            in_trade = False
+
+    return {
+        "entry_idx": np.asarray(entry_idx, dtype=np.int64),
+        "exit_idx": np.asarray(exit_idx, dtype=np.int64),
+        "PnL": np.asarray(pnl_out, dtype=np.float64),
+        "tradeDD": np.asarray(dd_out, dtype=np.float64),
+        "result": np.asarray(result, dtype=np.int8),
+    }
+
+
+def _series(n=3000, seed=6):
+    rng = np.random.default_rng(seed)
+    spread = np.cumsum(rng.normal(0, 2e-4, n))
+    zscore = np.convolve(rng.normal(0, 1, n), np.ones(8) / 8 ** 0.5, mode="same")
+    corr = rng.uniform(0.5, 1.0, n)
+    return spread, zscore, corr
+
+
+def _assert_same(a, b):
+    for k in ("entry_idx", "exit_idx", "result"):
+        np.testing.assert_array_equal(a[k], b[k])
+    np.testing.assert_allclose(a["PnL"], b["PnL"], rtol=0, atol=1e-9)
+    np.testing.assert_allclose(a["tradeDD"], b["tradeDD"], rtol=0, atol=1e-9)
+
+
+def test_close_open_matches_bars():
+    spread, zscore, corr = _series()
+    for stop in range(2900, 3000, 7):   # ตัดหลายจุด ให้มีทั้งไม้ค้างและไม่ค้าง
+        args = spread[:stop], zscore[:stop], corr[:stop]
+        for params in ({}, {"SL": 5}, {"z_sl": 3.0}):
+            forced = simulate(*args, close_open=True, **params)
+            _assert_same(forced, simulate_bars(*args, close_open=True, **params))
+            plain = simulate(*args, **params)
+            # close_open เพิ่มได้แค่ไม้สุดท้ายที่ปิดแท่งสุดท้าย
+            assert len(forced["PnL"]) - len(plain["PnL"]) in (0, 1)
+            if len(forced["PnL"]) > len(plain["PnL"]):
+                assert forced["result"][-1] == EXIT_END and forced["exit_idx"][-1] == stop - 1
+
+
+def test_simulate_matches_bars_no_sl():
+    spread, zscore, corr = _series()
+    res = simulate(spread, zscore, corr)
+    assert len(res["PnL"]) > 20
+    _assert_same(res, simulate_bars(spread, zscore, corr))
+
+
+def test_simulate_matches_bars_sl():
+    spread, zscore, corr = _series()
+    for params in ({"SL": 5}, {"SL": 20}, {"z_sl": 3.0}, {"SL": 10, "z_sl": 2.8}):
+        res = simulate(spread, zscore, corr, **params)
+        _assert_same(res, simulate_bars(spread, zscore, corr, **params))
+    assert (simulate(spread, zscore, corr, SL=5)["result"] == EXIT_SL).any()
+    assert (simulate(spread, zscore, corr, z_sl=3.0)["result"] == EXIT_ZSL).any()
+
+
+def test_simulate_matches_bars_targets():
+    spread, zscore, corr = _series()
+    # หลาย TP (รวม tp1 = tp2 และ tp2 = 0 ที่ไม่มีวัน TP -> ออกได้แค่ SL)
+    for tp1, tp2 in ((1.0, 0.1), (0.5, 0.5), (1.5, 0.0), (0.8, 0.3)):
+        params = dict(tp1=tp1, tp2=tp2, SL=15)
+        _assert_same(simulate(spread, zscore, corr, **params), simulate_bars(spread, zscore, corr, **params))
+
+
+def test_simulate_windows_matches_bars():
+    spread, _, _ = _series()
+    cols = [_series(seed=s) for s in (7, 8, 9)]
+    zscore = np.column_stack([c[1] for c in cols])
+    corr = np.column_stack([c[2] for c in cols])
+    results = simulate_windows(spread, zscore, corr, tp1=0.8, SL=10)
+    for k, res in enumerate(results):
+        _assert_same(res, simulate_bars(spread, zscore[:, k], corr[:, k], tp1=0.8, SL=10))
+    assert all((r["result"] == EXIT_TP).any() for r in results)
+
+
+# === Regression: loop iterrows เดิมของ backtest_partial_noSL.py / backtest_partial_sl30_full.py ===
+def _iterrows_partial(df, z_threshold=2.0, corr_threshold=0.8, SL=None, COST=1.2):
+    equity = 0
+    in_trade, entry_z, entry_spread, entry_time = False, 0, 0, None
+    trade_log = []
+
+    for t, row in df.iterrows():
+        z, corr, spread = row["zscore"], row["corr"], row["spread"]
+
+        if not in_trade:
+            if abs(z) > z_threshold and corr > corr_threshold:
+                in_trade, entry_z, entry_spread, entry_time = True, z, spread, t
+                partial_pnl = 0
+                worst_unreal = 0
+        else:
+            move = (spread - entry_spread) * 10000 if entry_z > 0 else (entry_spread - spread) * 10000
+            unrealized = move - COST
+            worst_unreal = min(worst_unreal, unrealized)
+
+            exit_trade, trade_pnl = False, 0
+            if SL is not None and unrealized <= -SL:
+                exit_trade, trade_pnl = True, unrealized + partial_pnl
+            else:
+                if abs(z) <= 1.0 and partial_pnl == 0:
+                    partial_pnl = (abs(entry_z - z) * 10)/2 - COST/2
+                if abs(z) < 0.1:
+                    exit_trade, trade_pnl = True, partial_pnl + ((abs(entry_z - z) * 10)/2 - COST/2)
+
+            if exit_trade:
+                equity += trade_pnl
+                trade_log.append({
+                    "entry": entry_time,
+                    "exit": t,
+                    "PnL": trade_pnl,
+                    "holding_h": (t - entry_time).total_seconds()/3600,
+                    "equity": equity,
+                    "tradeDD": worst_unreal
+                })
+                in_trade = False
+
+    return pd.DataFrame(trade_log)
+
+
+def _h1_frame(n=2500, window=50, seed=11):
+    # indicator แบบสคริปต์เดิม (pandas rolling) บนราคา 5 ตำแหน่ง
+    rng = np.random.default_rng(seed)
+    eur = np.round(1.10 + np.cumsum(rng.normal(0, 5e-4, n)), 5)
+    spread = np.zeros(n)
+    for i in range(1, n):
+        spread[i] = 0.96 * spread[i - 1] + rng.normal(0, 3e-4)
+    index = pd.date_range("2024-01-01", periods=n, freq="h", name="datetime")
+    df = pd.DataFrame({"EURUSD": eur, "GBPUSD": np.round(eur - 0.2 - spread, 5)}, index=index)
+    df["spread"] = df["EURUSD"] - df["GBPUSD"]
+    df["zscore"] = (df["spread"] - df["spread"].rolling(window).mean()) / df["spread"].rolling(window).std()
+    df["corr"] = df["EURUSD"].rolling(window).corr(df["GBPUSD"])
+    return df.dropna()
+
+
+def test_trade_log_matches_iterrows():
+    df = _h1_frame()
+    for params in ({}, {"SL": 30}, {"SL": 10, "corr_threshold": 0.5}):
+        ref = _iterrows_partial(df, **params)
+        got = backtest_partial(df, cost=1.2, **params)
+        assert len(ref) > 10
+        pd.testing.assert_frame_equal(got, ref, check_dtype=False, check_index_type=False, rtol=0, atol=1e-9)
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from indicator_store import IndicatorStore
+from optimizer import _rounds, successive_halving
+from sweep import make_grid, run_sweep
+
+
+def _pair(n=6000, seed=1):
+    rng = np.random.default_rng(seed)
+    eur = 1.10 + np.cumsum(rng.normal(0, 3e-4, n))
+    # spread mean-revert รอบศูนย์ -> มีไม้เข้าออกพอให้จัดอันดับได้
+    spread = np.zeros(n)
+    for i in range(1, n):
+        spread[i] = 0.97 * spread[i - 1] + rng.normal(0, 4e-4)
+    index = pd.date_range("2024-01-01", periods=n, freq="15min", name="datetime")
+    return pd.DataFrame({"EURUSD": eur, "GBPUSD": eur - 0.2 - spread}, index=index)
+
+
+def test_rounds_exact_powers():
+    # log(243, 3) ทศนิยมได้ 4.999... แต่ต้องได้ 5 รอบ
+    assert _rounds(243, 10**9, 3, 500) == 5
+    assert _rounds(242, 10**9, 3, 500) == 4
+    assert _rounds(1000, 10**9, 10, 1) == 3
+
+
+def test_rounds_limited_by_min_bars():
+    assert _rounds(243, 500 * 9, 3, 500) == 2
+    assert _rounds(243, 499, 3, 500) == 0
+    assert _rounds(1, 10**9, 3, 500) == 0
+
+
+def test_halving_matches_full_sweep():
+    df = _pair()
+    grid = make_grid(z_threshold=[1.5, 2.0, 2.5, 3.0], corr_threshold=[0.0], window=[10, 20, 50, 100],
+                     tp1=[1.0, 0.5], tp2=[0.1], SL=[None, 10, 30], cost=[1.2])
+    store = IndicatorStore()
+    full = run_sweep(df, grid, workers=2, chunk=7, store=store)
+    result, report = successive_halving(df, grid, eta=3, min_bars=500, min_trades=1,
+                                        workers=2, chunk=7, store=store)
+    assert len(report["rounds"]) > 1
+    # ทุก config ที่รอดมาต้องมีสถิติเท่ากับ config เดียวกันใน full sweep
+    keys = list(grid[0])
+    def config(row):
+        return tuple(None if pd.isna(row[k]) else row[k] for k in keys)
+
+    by_config = {config(row): row for _, row in full.iterrows()}
+    for _, row in result.iterrows():
+        ref = by_config[config(row)]
+        assert (row["Total PnL"], row["Trades"]) == (ref["Total PnL"], ref["Trades"])
+    assert result["Total PnL"].iloc[0] == full["Total PnL"].max()
@@ -0,0 +1,25 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from report import ReportPool
+
+
+def _trades(n=30, seed=0):
+    pnl = np.random.default_rng(seed).normal(2, 10, n)
+    exit_ = pd.date_range("2024-01-01", periods=n, freq="D")
+    return pd.DataFrame({"exit": exit_, "PnL": pnl, "equity": np.cumsum(pnl)})
+
+
+def test_labels_are_sanitized(tmp_path):
+    out = tmp_path / "reports"
+    with ReportPool(out_dir=str(out), workers=2) as reports:
+        reports.add_trades("../../etc/evil run", _trades())
+        reports.add_trades("../../etc/evil:run", _trades(seed=1))   # slug เดียวกัน ต้องไม่ทับกัน
+    files = sorted(os.listdir(out))
+    assert "index.html" in files
+    charts = [f for f in files if f.endswith(".png")]
+    assert len(charts) == 6
+    assert all("/" not in f and not f.startswith(".") for f in charts)
+    assert not (tmp_path / "etc").exists()
@@ -0,0 +1,19 @@
+import numpy as np
+import pandas as pd
+
+from repricing import needs_resimulation, rollovers
+
+
+def test_rollovers_at_new_york_close():
+    # 2024-02-05 = จันทร์, rollover 17:00 เวลาใน data
+    entry = ["2024-02-05 16:00", "2024-02-05 23:00", "2024-02-07 16:00", "2024-02-09 16:00", "2024-02-05 10:00"]
+    exit_ = ["2024-02-05 18:00", "2024-02-06 01:00", "2024-02-07 18:00", "2024-02-12 03:00", "2024-02-12 10:00"]
+    # ข้าม 17:00 = 1, ไม่ข้าม = 0, พุธ = 3, ศุกร์ -> จันทร์ = 1, ทั้งสัปดาห์ = 7
+    np.testing.assert_array_equal(rollovers(entry, exit_), [1, 0, 3, 1, 7])
+
+
+def test_needs_resimulation_ignores_nan_sl():
+    summary = pd.DataFrame({"window": [20, 20], "SL": [np.nan, 30.0]})
+    assert [needs_resimulation(row) for row in summary.to_dict("records")] == [False, True]
+    assert needs_resimulation(summary).tolist() == [False, True]
+    assert not needs_resimulation({"window": 20})
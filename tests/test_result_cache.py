@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from result_cache import ResultCache
+
+
+def _put(cache, key, n):
+    trades = pd.DataFrame({"PnL": np.ones(n)})
+    return cache.put(key, trades, np.cumsum(trades["PnL"]), {"Trades": n})
+
+
+def test_evict_drops_least_recent(tmp_path):
+    cache = ResultCache(root=str(tmp_path), max_bytes=10**9)
+    for key in ("a", "b", "c"):
+        _put(cache, key, 10)
+    size = cache._read_meta("a")["bytes"]
+    cache.max_bytes = 2 * size
+    assert cache.evict() == ["a"]
+    assert cache.get("b") is not None and cache.get("c") is not None
+
+
+def test_put_never_evicts_itself(tmp_path):
+    cache = ResultCache(root=str(tmp_path), max_bytes=10**9)
+    _put(cache, "small", 1)
+    cache.max_bytes = 1   # ตัวที่เพิ่งเขียนใหญ่เกิน max_bytes คนเดียว
+    _put(cache, "big", 10_000)
+    assert cache.get("big") is not None
+    assert cache.get("small") is None
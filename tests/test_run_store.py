@@ -0,0 +1,19 @@
+import math
+
+from run_store import RunStore
+
+
+def _stats(pnl, dd, trades=60):
+    return {"Trades": trades, "Total PnL": pnl, "Win rate": 0.6, "Avg PnL": pnl / trades,
+            "Max DD": dd, "Max In-trade DD": -10.0, "Avg Hold": 12.0}
+
+
+def test_top_keeps_zero_drawdown_runs(tmp_path):
+    with RunStore(str(tmp_path / "runs.sqlite")) as store:
+        store.record({"window": 50, "SL": 30}, _stats(500.0, 100.0))
+        best = store.record({"window": 50}, _stats(2671.0, 0.0))
+        store.record({"window": 20}, _stats(-40.0, 0.0))
+        top = store.top(3)
+        assert top["id"].tolist()[0] == best
+        assert math.isinf(top["pnl_dd"].iloc[0]) and top["pnl_dd"].iloc[0] > 0
+        assert top["pnl_dd"].iloc[-1] < 0
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from indicators import rolling_pair_kernel
+from scanner import pair_stats
+
+
+def _closes(n=3000, symbols=("EURUSD", "GBPUSD", "AUDUSD"), seed=2):
+    rng = np.random.default_rng(seed)
+    base = 1.0 + np.cumsum(rng.normal(0, 3e-4, (n, 1)), axis=0)
+    legs = base + np.cumsum(rng.normal(0, 2e-4, (n, len(symbols))), axis=0)
+    return pd.DataFrame(legs, columns=list(symbols))
+
+
+def test_pair_columns_match_kernel():
+    closes = _closes()
+    corr, zscore = pair_stats(closes, 50)
+    ref = rolling_pair_kernel(closes["EURUSD"].to_numpy(), closes["AUDUSD"].to_numpy(), 50)
+    np.testing.assert_array_equal(zscore["EURUSD/AUDUSD"], ref["zscore"])
+    np.testing.assert_array_equal(corr["EURUSD/AUDUSD"], ref["corr"])
+
+
+def test_nan_only_poisons_its_window():
+    closes = _closes()
+    closes.iloc[500, 0] = np.nan
+    corr, zscore = pair_stats(closes, 50)
+    z = zscore["EURUSD/GBPUSD"].to_numpy()
+    assert np.isnan(z[500:550]).all()
+    assert np.isfinite(z[550:]).all()
+    # คู่ที่ไม่มี EURUSD ไม่โดน
+    assert np.isfinite(zscore["GBPUSD/AUDUSD"].to_numpy()[49:]).all()
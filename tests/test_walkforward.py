@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from indicator_store import IndicatorStore
+from sweep import make_grid
+from walkforward import make_folds, walk_forward
+
+
+def _pair(n=4000, seed=4):
+    rng = np.random.default_rng(seed)
+    eur = 1.10 + np.cumsum(rng.normal(0, 3e-4, n))
+    spread = np.zeros(n)
+    for i in range(1, n):
+        spread[i] = 0.995 * spread[i - 1] + rng.normal(0, 4e-4)   # revert ช้า -> มีไม้ค้างข้าม fold
+    index = pd.date_range("2024-01-01", periods=n, freq="h", name="datetime")
+    return pd.DataFrame({"EURUSD": eur, "GBPUSD": eur - 0.2 - spread}, index=index)
+
+
+def test_open_trades_close_at_fold_end():
+    df = _pair()
+    grid = make_grid(z_threshold=[1.5, 2.0], corr_threshold=[0.0], window=[20, 50], tp1=[1.0], tp2=[0.1],
+                     SL=[None], cost=[1.2])
+    summary, oos = walk_forward(df, grid, train="30D", test="10D", min_trades=1, workers=2,
+                                store=IndicatorStore())
+    entry = df.index.get_indexer(oos["entry"])
+    exit_ = df.index.get_indexer(oos["exit"])
+    # ทุกไม้ปิดภายใน test fold ของตัวเอง และมีไม้ที่ถูกบังคับปิดที่แท่งสุดท้ายของ fold
+    forced = 0
+    for _, b, c in make_folds(df.index, "30D", "10D"):
+        mine = (entry >= b) & (entry < c)
+        assert (exit_[mine] <= c - 1).all()
+        forced += int((exit_[mine] == c - 1).sum())
+    assert forced > 0
+    assert summary["OOS Trades"].sum() == len(oos)
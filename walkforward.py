@@ -0,0 +1,101 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from datastore import load_pair
+from engine import simulate, to_trade_log, trade_stats
+from sweep import (SIM_PARAMS, SharedArrays, init_worker, make_grid, publish_indicators, window_column,
+                   worker_arrays)
+
+# === Walk-forward optimization ===
+# แบ่งประวัติเป็น fold (train -> test) แบบเลื่อนไปเรื่อย ๆ
+# optimize บน train, เอาตัวชนะไปรันบน test ถัดไป แล้วต่อ equity ของ test ทุก fold = out-of-sample
+# indicator คำนวณบนข้อมูลทั้งก้อนครั้งเดียว (rolling ใช้แค่ข้อมูลในอดีต) แล้ว slice ตาม fold
+# -> แท่งแรกของทุก fold มี warm-up ครบ window แท่งจากข้อมูลก่อนหน้า ไม่มี look-ahead
+# ไม้ที่ยังเปิดตอนจบ test fold บังคับปิดที่แท่งสุดท้ายของ fold (EXIT_END, PnL = unrealized + partial)
+# -> OOS ของแต่ละ fold จบในตัว ไม่ทิ้งไม้ค้างและไม่ถือทับ fold ถัดไปที่ใช้ params ใหม่
+# ไม่ผ่าน result_cache ด้วยเหตุผลเดียวกับ sweep.py (รันใน worker บน shared memory, train ทุกจุดคืนแค่สถิติ)
+
+
+def make_folds(index, train="180D", test="30D"):
+    """Rolling (train_start, train_end, test_end) bar positions; test window steps forward by `test`."""
+    index = pd.DatetimeIndex(index)
+    train, test = pd.Timedelta(train), pd.Timedelta(test)
+    folds = []
+    start = index[0]
+    while True:
+        a, b, c = index.searchsorted([start, start + train, start + train + test])
+        if c <= b or b >= len(index):
+            break
+        folds.append((int(a), int(b), int(c)))
+        if c >= len(index):
+            break
+        start += test
+    return folds
+
+
+def _simulate_slice(arrays, p, a, b, close_open=False):
+    col = window_column(arrays, p["window"])
+    return simulate(arrays["spread"][a:b], arrays["zscore"][a:b, col], arrays["corr"][a:b, col],
+                    close_open=close_open, **{k: p[k] for k in SIM_PARAMS if k in p})
+
+
+def _run_fold(task):
+    fold_no, (a, b, c), grid, objective, min_trades = task
+    arrays = worker_arrays()
+    time = arrays["time"]
+
+    best, best_score = None, -np.inf
+    for p in grid:
+        stats = trade_stats(_simulate_slice(arrays, p, a, b), time[a:b])
+        score = stats[objective] if stats["Trades"] >= min_trades else -np.inf
+        if score > best_score:
+            best, best_score = p, score
+    if best is None:
+        best = grid[0]
+
+    res = _simulate_slice(arrays, best, b, c, close_open=True)
+    res["entry_idx"] = res["entry_idx"] + b   # กลับเป็น index ของทั้งก้อน
+    res["exit_idx"] = res["exit_idx"] + b
+    row = dict(fold=fold_no, train_start=a, test_start=b, test_end=c, train_score=best_score, **best)
+    row.update({f"OOS {k}": v for k, v in trade_stats(res, time).items()})
+    return row, res
+
+
+def walk_forward(df, grid, train="180D", test="30D", objective="Total PnL", min_trades=5,
+                 workers=None, tf="", store=None):
+    """Optimize on each train slice, evaluate on the next test slice.
+
+    A test trade still open at the end of its fold is closed on the fold's last bar.
+    Returns (fold summary DataFrame, stitched out-of-sample trade log).
+    """
+    folds = make_folds(df.index, train, test)
+    if not folds:
+        raise ValueError(f"history too short for one {train} train + {test} test fold")
+    tasks = [(k, f, grid, objective, min_trades) for k, f in enumerate(folds)]
+    with SharedArrays(publish_indicators(df, [p["window"] for p in grid], tf, store)) as shared:
+        with ProcessPoolExecutor(workers or os.cpu_count(), initializer=init_worker,
+                                 initargs=(shared.spec,)) as pool:
+            results = list(pool.map(_run_fold, tasks))
+
+    summary = pd.DataFrame([row for row, _ in results])
+    for col in ("train_start", "test_start", "test_end"):
+        summary[col] = df.index[np.minimum(summary[col], len(df) - 1)]
+    stitched = {k: np.concatenate([res[k] for _, res in results])
+                for k in ("entry_idx", "exit_idx", "PnL", "tradeDD", "result")}
+    return summary, to_trade_log(df.index, stitched)
+
+
+if __name__ == "__main__":
+    from report import ReportPool
+
+    df = load_pair("H1")
+    grid = make_grid(z_threshold=[2.0, 2.5], corr_threshold=[0.8, 0.9], window=[20, 50],
+                     tp1=[1.0, 0.5], SL=[None, 30], cost=[1.2])
+    summary, oos = walk_forward(df, grid, train="120D", test="30D", tf="H1")
+    with ReportPool() as reports:
+        reports.add_trades("H1 walk-forward OOS", oos)
+        print(summary.to_string(index=False))
+        print(f"OOS trades: {len(oos)}  OOS PnL: {oos['PnL'].sum():.2f} pips")
@@ -1,31 +1,11 @@
-import pandas as pd
 import matplotlib.pyplot as plt
+from report import show
+from indicators import signal_view
 
-# === โหลดไฟล์ H1 และ M15 ===
-eur_h1 = pd.read_csv("data/EURUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
-gbp_h1 = pd.read_csv("data/GBPUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
-
-eur_m15 = pd.read_csv("data/EURUSD_M15_2024.csv", parse_dates=["datetime"], index_col="datetime")
-gbp_m15 = pd.read_csv("data/GBPUSD_M15_2024.csv", parse_dates=["datetime"], index_col="datetime")
-
-# === เลือกช่วงเวลาที่ต้องการ (1 ก.พ. ถึง 7 ก.พ. 2024) ===
+# === เลือกช่วงเวลาที่ต้องการ (1 ก.พ. ถึง 7 ก.พ. 2024) + warm-up เท่า window ===
 start, end = "2024-02-01", "2024-02-07"
-eur_h1, gbp_h1 = eur_h1.loc[start:end], gbp_h1.loc[start:end]
-eur_m15, gbp_m15 = eur_m15.loc[start:end], gbp_m15.loc[start:end]
-
-# === รวมข้อมูล ===
-df_h1 = pd.DataFrame({"EURUSD": eur_h1["close"], "GBPUSD": gbp_h1["close"]}).dropna()
-df_m15 = pd.DataFrame({"EURUSD": eur_m15["close"], "GBPUSD": gbp_m15["close"]}).dropna()
-
-# === ฟังก์ชันสร้าง indicator ===
-def make_indicators(df, window):
-    df["corr"] = df["EURUSD"].rolling(window).corr(df["GBPUSD"])
-    df["spread"] = df["EURUSD"] - df["GBPUSD"]
-    df["zscore"] = (df["spread"] - df["spread"].rolling(window).mean()) / df["spread"].rolling(window).std()
-    return df
-
-df_h1 = make_indicators(df_h1, window=50)
-df_m15 = make_indicators(df_m15, window=20)
+df_h1 = signal_view("H1", start, end, window=50)
+df_m15 = signal_view("M15", start, end, window=20)
 
 # === ฟังก์ชัน plot signals ===
 def plot_with_signals(ax, df, title):
@@ -75,4 +55,4 @@ axes[1,1].set_title("M15 Correlation")
 plot_with_signals(axes[1,2], df_m15, "M15 Spread Z-score with Signals")
 
 plt.tight_layout()
-plt.show()
+show()
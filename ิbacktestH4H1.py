@@ -1,14 +1,17 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+from datastore import load_csv
+from report import show
+from indicators import make_indicators
 
 def load_data(tf="H1"):
     if tf == "H1":
-        eur = pd.read_csv("data/EURUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
-        gbp = pd.read_csv("data/GBPUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
+        eur = load_csv("data/EURUSD_H1_2024.csv")
+        gbp = load_csv("data/GBPUSD_H1_2024.csv")
     elif tf == "H4":
-        eur = pd.read_csv("data/EURUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
-        gbp = pd.read_csv("data/GBPUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
+        eur = load_csv("data/EURUSD_H1_2024.csv")
+        gbp = load_csv("data/GBPUSD_H1_2024.csv")
         eur = eur.resample("4H").agg({"open":"first","high":"max","low":"min","close":"last"}).dropna()
         gbp = gbp.resample("4H").agg({"open":"first","high":"max","low":"min","close":"last"}).dropna()
     else:
@@ -20,9 +23,7 @@ def backtest(eur, gbp, label=""):
 
     # Indicators
     window = 20
-    df["spread"] = df["EURUSD"] - df["GBPUSD"]
-    df["zscore"] = (df["spread"] - df["spread"].rolling(window).mean()) / df["spread"].rolling(window).std()
-    df["corr"] = df["EURUSD"].rolling(window).corr(df["GBPUSD"])
+    df = make_indicators(df, window)
 
     # Params
     COST = 0.6
@@ -85,4 +86,4 @@ plt.figure(figsize=(12,6))
 eur, gbp = load_data("H1"); backtest(eur, gbp, "H1")
 eur, gbp = load_data("H4"); backtest(eur, gbp, "H4")
 plt.legend(); plt.title("Equity Curve H1 vs H4 (Partial Exit)"); plt.grid(True)
-plt.show()
+show()
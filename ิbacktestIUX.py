@@ -1,18 +1,16 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+from datastore import load_pair
+from report import show
+from indicators import make_indicators
 
 # --- Load data ---
-eur = pd.read_csv("data/EURUSD_M15_2024.csv", parse_dates=["datetime"], index_col="datetime")
-gbp = pd.read_csv("data/GBPUSD_M15_2024.csv", parse_dates=["datetime"], index_col="datetime")
-
-df = pd.DataFrame({"EURUSD": eur["close"], "GBPUSD": gbp["close"]}).dropna()
+df = load_pair("M15")
 
 # --- Indicators ---
 window = 20
-df["spread"] = df["EURUSD"] - df["GBPUSD"]
-df["zscore"] = (df["spread"] - df["spread"].rolling(window).mean()) / df["spread"].rolling(window).std()
-df["corr"] = df["EURUSD"].rolling(window).corr(df["GBPUSD"])
+df = make_indicators(df, window)
 
 # --- Parameters ---
 COST_PER_TRADE = 0.6
@@ -112,4 +110,4 @@ plt.title("Equity Curve with Partial Exit (TP1=0.5, TP2=0.0, SL=3, cost=0.6 pips
 plt.xlabel("Date")
 plt.ylabel("Cumulative PnL (pips)")
 plt.grid(True)
-plt.show()
+show()
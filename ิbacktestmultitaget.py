@@ -1,18 +1,17 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+from datastore import load_pair
+from engine import simulate_multi_target
+from report import show
+from indicators import make_indicators
 
 # --- Load data ---
-eur = pd.read_csv("data/EURUSD_M15_2024.csv", parse_dates=["datetime"], index_col="datetime")
-gbp = pd.read_csv("data/GBPUSD_M15_2024.csv", parse_dates=["datetime"], index_col="datetime")
-
-df = pd.DataFrame({"EURUSD": eur["close"], "GBPUSD": gbp["close"]}).dropna()
+df = load_pair("M15")
 
 # --- Indicators ---
 window = 20
-df["spread"] = df["EURUSD"] - df["GBPUSD"]
-df["zscore"] = (df["spread"] - df["spread"].rolling(window).mean()) / df["spread"].rolling(window).std()
-df["corr"] = df["EURUSD"].rolling(window).corr(df["GBPUSD"])
+df = make_indicators(df, window)
 
 # --- Parameters ---
 SPREAD_COST = 1.0 + 1.5   # EURUSD + GBPUSD
@@ -21,50 +20,13 @@ COST_PER_TRADE = SPREAD_COST + COMMISSION  # ~3.5 pips
 
 TP_LIST = [0.0, 0.5, 0.8]   # <<< ทดลองหลายค่า
 
-# --- Function Backtest ---
-def backtest(tp_target):
-    trades = []
-    position = None
-
-    for t, row in df.iterrows():
-        z, corr = row["zscore"], row["corr"]
-        eur_price, gbp_price = row["EURUSD"], row["GBPUSD"]
-
-        if position is None:
-            if corr > 0.8:
-                if z > 2:
-                    position = {"side": "short", "entry_time": t,
-                                "eur_entry": eur_price, "gbp_entry": gbp_price, "entry_z": z}
-                elif z < -2:
-                    position = {"side": "long", "entry_time": t,
-                                "eur_entry": eur_price, "gbp_entry": gbp_price, "entry_z": z}
-        else:
-            if abs(z) <= tp_target or abs(z) >= 3:
-                eur_exit, gbp_exit = eur_price, gbp_price
-
-                if position["side"] == "long":
-                    eur_pnl = (eur_exit - position["eur_entry"]) / 0.0001
-                    gbp_pnl = (position["gbp_entry"] - gbp_exit) / 0.0001
-                else:  # short
-                    eur_pnl = (position["eur_entry"] - eur_exit) / 0.0001
-                    gbp_pnl = (gbp_exit - position["gbp_entry"]) / 0.0001
-
-                net_pnl = eur_pnl + gbp_pnl - COST_PER_TRADE
-
-                trades.append({
-                    "entry_time": position["entry_time"],
-                    "exit_time": t,
-                    "side": position["side"],
-                    "entry_z": position["entry_z"],
-                    "exit_z": z,
-                    "eur_pnl": eur_pnl,
-                    "gbp_pnl": gbp_pnl,
-                    "net_pnl": net_pnl,
-                    "result": "TP" if abs(z) <= tp_target else "SL"
-                })
-                position = None
+# --- Backtest ทุก TP ในรอบเดียว (entry เหมือนกัน ต่างกันแค่ exit) ---
+all_results = simulate_multi_target(df.index, df["EURUSD"], df["GBPUSD"], df["zscore"], df["corr"],
+                                    TP_LIST, z_threshold=2.0, corr_threshold=0.8, z_sl=3.0,
+                                    cost=COST_PER_TRADE)
 
-    results = pd.DataFrame(trades)
+# --- Summary ---
+def summarize(tp_target, results):
     if results.empty:
         return {"TP_target": tp_target, "Total trades": 0}
 
@@ -88,45 +50,17 @@ def backtest(tp_target):
     }
 
 # --- Run all TP ---
-summary = pd.DataFrame([backtest(tp) for tp in TP_LIST])
+summary = pd.DataFrame([summarize(tp, all_results[tp]) for tp in TP_LIST])
 print(summary)
 
-# --- Plot equity for compare ---
+# --- Plot equity for compare (ใช้ผลเดิม ไม่ต้องรันซ้ำ) ---
 plt.figure(figsize=(12,6))
 for tp in TP_LIST:
-    results = backtest(tp)
-    # rerun to get equity
-    trades = []
-    position = None
-    for t, row in df.iterrows():
-        z, corr = row["zscore"], row["corr"]
-        eur_price, gbp_price = row["EURUSD"], row["GBPUSD"]
-        if position is None:
-            if corr > 0.8:
-                if z > 2:
-                    position = {"side": "short", "entry_time": t,
-                                "eur_entry": eur_price, "gbp_entry": gbp_price, "entry_z": z}
-                elif z < -2:
-                    position = {"side": "long", "entry_time": t,
-                                "eur_entry": eur_price, "gbp_entry": gbp_price, "entry_z": z}
-        else:
-            if abs(z) <= tp or abs(z) >= 3:
-                eur_exit, gbp_exit = eur_price, gbp_price
-                if position["side"] == "long":
-                    eur_pnl = (eur_exit - position["eur_entry"]) / 0.0001
-                    gbp_pnl = (position["gbp_entry"] - gbp_exit) / 0.0001
-                else:
-                    eur_pnl = (position["eur_entry"] - eur_exit) / 0.0001
-                    gbp_pnl = (gbp_exit - position["gbp_entry"]) / 0.0001
-                net_pnl = eur_pnl + gbp_pnl - COST_PER_TRADE
-                trades.append({"exit_time": t, "net_pnl": net_pnl})
-                position = None
-    if trades:
-        res = pd.DataFrame(trades)
-        res["equity"] = res["net_pnl"].cumsum()
+    res = all_results[tp]
+    if not res.empty:
         plt.plot(res["exit_time"], res["equity"], label=f"TP={tp}")
 
 plt.title("Equity Curve Comparison (different TP targets)")
 plt.legend()
 plt.grid(True)
-plt.show()
+show()
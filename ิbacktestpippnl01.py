@@ -1,17 +1,15 @@
 import pandas as pd
 import matplotlib.pyplot as plt
+from datastore import load_pair
+from report import show
+from indicators import make_indicators
 
 # --- Load data ---
-eur = pd.read_csv("data/EURUSD_M15_2024.csv", parse_dates=["datetime"], index_col="datetime")
-gbp = pd.read_csv("data/GBPUSD_M15_2024.csv", parse_dates=["datetime"], index_col="datetime")
-
-df = pd.DataFrame({"EURUSD": eur["close"], "GBPUSD": gbp["close"]}).dropna()
+df = load_pair("M15")
 
 # --- Indicators ---
 window = 20
-df["spread"] = df["EURUSD"] - df["GBPUSD"]
-df["zscore"] = (df["spread"] - df["spread"].rolling(window).mean()) / df["spread"].rolling(window).std()
-df["corr"] = df["EURUSD"].rolling(window).corr(df["GBPUSD"])
+df = make_indicators(df, window)
 
 # --- Backtest loop ---
 trades = []
@@ -76,4 +74,4 @@ plt.title("Equity Curve (PnL in pips, 2024)")
 plt.xlabel("Date")
 plt.ylabel("Cumulative PnL (pips)")
 plt.grid(True)
-plt.show()
+show()
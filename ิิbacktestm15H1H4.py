@@ -1,16 +1,19 @@
 import pandas as pd
 import matplotlib.pyplot as plt
+from datastore import load_csv
+from report import show
+from indicators import make_indicators
 
 def load_data(tf="M15"):
     if tf == "M15":
-        eur = pd.read_csv("data/EURUSD_M15_2024.csv", parse_dates=["datetime"], index_col="datetime")
-        gbp = pd.read_csv("data/GBPUSD_M15_2024.csv", parse_dates=["datetime"], index_col="datetime")
+        eur = load_csv("data/EURUSD_M15_2024.csv")
+        gbp = load_csv("data/GBPUSD_M15_2024.csv")
     elif tf == "H1":
-        eur = pd.read_csv("data/EURUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
-        gbp = pd.read_csv("data/GBPUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
+        eur = load_csv("data/EURUSD_H1_2024.csv")
+        gbp = load_csv("data/GBPUSD_H1_2024.csv")
     elif tf == "H4":
-        eur = pd.read_csv("data/EURUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
-        gbp = pd.read_csv("data/GBPUSD_H1_2024.csv", parse_dates=["datetime"], index_col="datetime")
+        eur = load_csv("data/EURUSD_H1_2024.csv")
+        gbp = load_csv("data/GBPUSD_H1_2024.csv")
         eur = eur.resample("4h").agg({"open":"first","high":"max","low":"min","close":"last"}).dropna()
         gbp = gbp.resample("4h").agg({"open":"first","high":"max","low":"min","close":"last"}).dropna()
     else:
@@ -23,9 +26,7 @@ def backtest(eur, gbp, label=""):
 
     # Indicators
     window = 20
-    df["spread"] = df["EURUSD"] - df["GBPUSD"]
-    df["zscore"] = (df["spread"] - df["spread"].rolling(window).mean()) / df["spread"].rolling(window).std()
-    df["corr"] = df["EURUSD"].rolling(window).corr(df["GBPUSD"])
+    df = make_indicators(df, window)
 
     # Params
     COST = 0.6
@@ -102,7 +103,7 @@ for tf in ["M15", "H1", "H4"]:
 plt.legend()
 plt.title("Equity Curve M15 vs H1 vs H4 (Partial Exit)")
 plt.grid(True)
-plt.show()
+show()
 
 # === Histogram กำไรต่อไม้ ===
 def plot_pnl_hist(results, label=""):
@@ -122,4 +123,4 @@ plt.title("PnL Distribution per Trade")
 plt.xlabel("PnL (pips)")
 plt.ylabel("Frequency")
 plt.grid(True)
-plt.show()
\ No newline at end of file
+show()
\ No newline at end of file